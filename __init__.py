@@ -1,22 +1,83 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from os.path import join, dirname
-from typing import Iterable, Union
+from queue import Queue, Empty
+from threading import BoundedSemaphore, Event, Lock, Thread
+from typing import Iterable, List, Optional, Tuple, Union
 
-from json_database import JsonStorageXDG
-from nuvem_de_som import SoundCloud
+from ovos_bus_client.message import Message
 from ovos_utils import classproperty
 from ovos_utils.log import LOG
-from ovos_utils.ocp import MediaType, PlaybackType, Playlist, PluginStream, dict2entry
-from ovos_utils.parse import fuzzy_match, MatchStrategy
+from ovos_utils.ocp import MediaEntry, MediaType, PlaybackType, Playlist, \
+    PluginStream, dict2entry
 from ovos_utils.process_utils import RuntimeRequirements
 from ovos_workshop.skills.common_play import OVOSCommonPlaybackSkill, \
     ocp_search
 
+from .deadline import Deadline, DeadlineExceeded, iterate_until
+from .index import TrackIndex
+from .metrics import SearchMetrics
+from .normalize import normalize_phrase
+from .playlist import LazyPlaylist, entry2track
+from .prefetch import Prefetcher
+from .ranking import merge_artists, unseen_tracks
+from .scoring import DurationRules, QueryScorer
+from .singleflight import SingleFlight
+from .streams import StreamCache, StreamResolver
+from .upstream import CircuitBreaker, CircuitOpen, install_session, \
+    pooled_session, retrying
+
+SEARCH_TYPES = ("artists", "sets", "tracks")
+# upstream results fetched ahead of the search consuming them, the next
+# page is only requested once the search gets close to it
+UPSTREAM_READAHEAD = 10
+# upper bounds set by the "low_resource" profile, on top of the settings
+LOW_RESOURCE = {"cache_max_entries": 200,
+                "cache_max_bytes": 1024 * 1024,
+                "local_index_max_tracks": 2000,
+                "playlist_score_tracks": 1,
+                "max_results": 10,
+                "max_playlist_tracks": 25,
+                "search_workers": len(SEARCH_TYPES),
+                "background_workers": 1,
+                "upstream_concurrency": 1,
+                "upstream_pool_size": 2}
+
+
+class _LazySoundCloud:
+    """ nuvem_de_som.SoundCloud, imported on first use, nuvem_de_som and
+    bs4 are a large part of the skill import time """
+
+    def __getattr__(self, name):
+        from nuvem_de_som import SoundCloud
+        return getattr(SoundCloud, name)
+
+
+SoundCloud = _LazySoundCloud()
+
 
 class SoundCloudSkill(OVOSCommonPlaybackSkill):
     def __init__(self, *args, **kwargs):
-        self._search_cache = JsonStorageXDG("soundcloud.search.history",
-                                            subfolder="common_play")
-        self._search_cache.clear()
+        self._search_cache = None
+        self._inflight = SingleFlight()
+        self._metrics = SearchMetrics()
+        self._prefetcher = None
+        self._revalidating = set()  # (searchtype, phrase) being refreshed
+        self._revalidating_lock = Lock()
+        self._breaker = CircuitBreaker()
+        self._index = TrackIndex()
+        self._durations = DurationRules()
+        self._streams = StreamCache()
+        self._resolver = None
+        self._session = None
+        self._requests = None  # nuvem_de_som's own requests module
+        self._client = None  # nuvem_de_som, once its session is installed
+        self._load_lock = Lock()
+        self._loaded = False
+        self._warmup_thread = None
+        self._executor = None
+        self._background = None  # revalidation and stream resolution
+        self._upstream_slots = None
         super().__init__(supported_media=[MediaType.MUSIC, MediaType.GENERIC],
                          skill_icon=join(dirname(__file__), "soundcloud.png"),
                          skill_voc_filename="soundcloud_skill",
@@ -30,248 +91,1011 @@ class SoundCloudSkill(OVOSCommonPlaybackSkill):
                                    requires_internet=True,
                                    requires_network=True,
                                    requires_gui=False,
-                                   no_internet_fallback=False,
-                                   no_network_fallback=False,
+                                   # cached and indexed results
+                                   no_internet_fallback=True,
+                                   no_network_fallback=True,
                                    no_gui_fallback=True)
 
     def initialize(self):
+        if "low_resource" not in self.settings:
+            # for constrained devices, caps the limits below to LOW_RESOURCE
+            # and disables prefetch and stream_preresolve
+            self.settings["low_resource"] = False
         if "cache" not in self.settings:
             self.settings["cache"] = True
         if "refresh_cache" not in self.settings:
-            self.settings["refresh_cache"] = True
+            self.settings["refresh_cache"] = False
+        if "cache_ttl" not in self.settings:
+            self.settings["cache_ttl"] = 7 * 24 * 60 * 60  # seconds
+        if "cache_soft_ttl" not in self.settings:
+            # older results are still served but refreshed in the background,
+            # seconds, 0 to only refresh them once they expire (cache_ttl)
+            self.settings["cache_soft_ttl"] = 24 * 60 * 60
+        if "cache_max_entries" not in self.settings:
+            self.settings["cache_max_entries"] = 1000
+        if "cache_max_bytes" not in self.settings:
+            self.settings["cache_max_bytes"] = 5 * 1024 * 1024
+        if "cache_backend" not in self.settings:
+            self.settings["cache_backend"] = "sqlite"  # or "json"
+        if "search_types" not in self.settings:
+            # more than one searchtype runs them in parallel
+            self.settings["search_types"] = ["artists"]
+        if "search_timeout" not in self.settings:
+            self.settings["search_timeout"] = 4  # seconds
+        if "min_partial_confidence" not in self.settings:
+            # playlists cut short by the timeout need at least this score
+            self.settings["min_partial_confidence"] = 50
+        if "playlist_score_tracks" not in self.settings:
+            # artist/set playlists are scored from their first tracks, the
+            # other entries are only built when needed, 0 builds all of them
+            self.settings["playlist_score_tracks"] = 3
+        if "max_results" not in self.settings:
+            # results per query, 0 for all of them, a number or one per
+            # searchtype, eg. {"artists": 5, "tracks": 20}
+            self.settings["max_results"] = 0
+        if "early_stop_results" not in self.settings:
+            # stop searching once this many results reach
+            # early_stop_confidence, 0 to search until max_results
+            self.settings["early_stop_results"] = 10
+        if "early_stop_confidence" not in self.settings:
+            self.settings["early_stop_confidence"] = 80
+        if "min_track_score" not in self.settings:
+            # track results lose 2 points per position, stop searching once
+            # the next one can not score this much, 0 to never stop
+            self.settings["min_track_score"] = 35
+        if "more_results" not in self.settings:
+            # results per "fetch more" page, see search_more
+            self.settings["more_results"] = 10
+        if "max_playlist_tracks" not in self.settings:
+            # tracks kept from each artist/set playlist, 0 for all of them
+            self.settings["max_playlist_tracks"] = 0
+        if "min_track_duration" not in self.settings:
+            # seconds, shorter tracks are previews and never results
+            self.settings["min_track_duration"] = 60
+        if "max_track_duration" not in self.settings:
+            # seconds, longer track results are probably podcasts or mixes,
+            # tracks in artist/set playlists are kept, 0 for no limit
+            self.settings["max_track_duration"] = 45 * 60
+        if "long_track_after" not in self.settings:
+            # seconds, longer tracks get the long_track_penalty
+            self.settings["long_track_after"] = 10 * 60
+        if "long_track_penalty" not in self.settings:
+            # score points per minute over long_track_after, 0 for none
+            self.settings["long_track_penalty"] = 1
+        if "search_workers" not in self.settings:
+            # threads for parallel searches, never less than one per
+            # searchtype so they all start right away
+            self.settings["search_workers"] = 6
+        if "background_workers" not in self.settings:
+            # threads for revalidating the cache and resolving streams,
+            # they never delay a search
+            self.settings["background_workers"] = 2
+        if "upstream_concurrency" not in self.settings:
+            # soundcloud searches running at the same time, 0 for no limit
+            self.settings["upstream_concurrency"] = 0
+        if "prefetch" not in self.settings:
+            # refresh popular cache entries before they expire, when idle
+            self.settings["prefetch"] = False
+        if "prefetch_artists" not in self.settings:
+            # always keep these artists cached, needs "prefetch"
+            self.settings["prefetch_artists"] = []
+        if "prefetch_interval" not in self.settings:
+            self.settings["prefetch_interval"] = 10 * 60  # seconds
+        if "prefetch_delay" not in self.settings:
+            # rate limit, seconds between prefetched queries
+            self.settings["prefetch_delay"] = 10
+        if "prefetch_max_queries" not in self.settings:
+            self.settings["prefetch_max_queries"] = 5  # per interval
+        if "prefetch_refresh_before" not in self.settings:
+            # refresh entries expiring in less than this many seconds
+            self.settings["prefetch_refresh_before"] = 24 * 60 * 60
+        if "metrics_interval" not in self.settings:
+            # seconds between metrics summaries, 0 to disable
+            self.settings["metrics_interval"] = 15 * 60
+        if "metrics_log" not in self.settings:
+            # debug log the timings of every search
+            self.settings["metrics_log"] = False
+        if "local_index" not in self.settings:
+            # index every track seen, for instant track results and
+            # results when soundcloud is unreachable
+            self.settings["local_index"] = True
+        if "local_index_max_tracks" not in self.settings:
+            self.settings["local_index_max_tracks"] = 20000
+        if "local_index_min_score" not in self.settings:
+            # indexed tracks yielded before searching soundcloud need this
+            self.settings["local_index_min_score"] = 60
+        if "stream_preresolve" not in self.settings:
+            # resolve the streams of the best results in the background,
+            # repeat searches hand them to playback while they are valid
+            self.settings["stream_preresolve"] = False
+        if "stream_preresolve_top" not in self.settings:
+            self.settings["stream_preresolve_top"] = 1  # results per search
+        if "stream_ttl" not in self.settings:
+            # seconds, validity of resolved streams that do not tell
+            self.settings["stream_ttl"] = 5 * 60
+        if "stream_min_validity" not in self.settings:
+            # seconds a resolved stream must still be valid for to be used
+            self.settings["stream_min_validity"] = 60
+        if "cache_stale_if_error" not in self.settings:
+            # expired results are kept this long to be served when
+            # soundcloud is unreachable, seconds
+            self.settings["cache_stale_if_error"] = 7 * 24 * 60 * 60
+        if "upstream_pool_size" not in self.settings:
+            # keep-alive connections to soundcloud
+            self.settings["upstream_pool_size"] = 10
+        if "upstream_retries" not in self.settings:
+            # failed requests and 429/5xx answers are retried
+            self.settings["upstream_retries"] = 2
+        if "upstream_backoff" not in self.settings:
+            # seconds, doubled on every retry
+            self.settings["upstream_backoff"] = 0.5
+        if "circuit_breaker_threshold" not in self.settings:
+            # consecutive failed searches before soundcloud is considered down
+            self.settings["circuit_breaker_threshold"] = 3
+        if "circuit_breaker_cooldown" not in self.settings:
+            # seconds without searching soundcloud once it is down
+            self.settings["circuit_breaker_cooldown"] = 60
+
+        if self.settings["local_index"]:
+            self._index.max_tracks = self._limit("local_index_max_tracks")
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(self._limit("search_workers"), len(SEARCH_TYPES)),
+            thread_name_prefix="soundcloud")
+        self._background = ThreadPoolExecutor(
+            max_workers=self._limit("background_workers"),
+            thread_name_prefix="soundcloud.background")
+        if self._limit("upstream_concurrency"):
+            self._upstream_slots = BoundedSemaphore(
+                self._limit("upstream_concurrency"))
+
+        if self.settings["stream_preresolve"] and \
+                not self.settings["low_resource"]:
+            self._streams.margin = self.settings["stream_min_validity"]
+            self._resolver = StreamResolver(
+                self._resolve_stream, self._background, self._streams,
+                default_ttl=self.settings["stream_ttl"])
+
+        self._durations.min_duration = self.settings["min_track_duration"]
+        self._durations.max_duration = self.settings["max_track_duration"]
+        self._durations.penalty_after = self.settings["long_track_after"]
+        self._durations.penalty = self.settings["long_track_penalty"]
+        self._breaker.threshold = self.settings["circuit_breaker_threshold"]
+        self._breaker.cooldown = self.settings["circuit_breaker_cooldown"]
 
+        # the cache and soundcloud client are loaded after startup, in the
+        # background or by the first search if it comes first
+        self._warmup_thread = Thread(target=self._warmup, daemon=True,
+                                     name="soundcloud.warmup")
+        self._warmup_thread.start()
+
+        if self.settings["prefetch"] and not self.settings["low_resource"]:
+            self._prefetcher = Prefetcher(
+                self._prefetch_candidates, self._prefetch,
+                interval=self.settings["prefetch_interval"],
+                delay=self.settings["prefetch_delay"],
+                max_queries=self.settings["prefetch_max_queries"])
+            self._prefetcher.start()
+
+        self.add_event("ovos.soundcloud.metrics", self.handle_metrics)
+        self.add_event("ovos.soundcloud.search.more", self.handle_search_more)
+        if self.settings["metrics_interval"]:
+            self.schedule_repeating_event(self.emit_metrics_summary, None,
+                                          self.settings["metrics_interval"],
+                                          name="soundcloud_metrics")
+
+    def shutdown(self):
+        # flush access times so LRU order survives restarts
+        if self._prefetcher is not None:
+            self._prefetcher.stop()
+        if self._search_cache is not None:
+            self._search_cache.close()
+        if self._requests is not None:
+            self._client.requests = self._requests
+            self._requests = None
+        if self._session is not None:
+            self._session.close()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        if self._background is not None:
+            self._background.shutdown(wait=False)
+        super().shutdown()
+
+    def _limit(self, name: str, searchtype: str = None) -> int:
+        """ setting capped by the low resource profile, 0 is no limit,
+        dict settings have a value per searchtype """
+        value = self.settings[name]
+        if isinstance(value, dict):
+            value = value.get(searchtype, 0)
+        if self.settings["low_resource"]:
+            cap = LOW_RESOURCE[name]
+            value = min(value, cap) if value else cap
+        return value
+
+    # deferred loading
+    def _warmup(self):
+        try:
+            self._ensure_loaded()
+            if self.settings["local_index"]:
+                self._load_index()
+        except Exception as e:
+            LOG.error(f"failed to load the soundcloud search cache: {e}")
+
+    def _ensure_loaded(self):
+        """ load the search cache and soundcloud client, once """
+        if self._loaded:
+            return
+        with self._load_lock:
+            if self._loaded:
+                return
+            if self._search_cache is None:
+                cache = self._open_cache()
+                if self._search_cache is None:
+                    self._search_cache = cache
+                else:  # replaced meanwhile, eg. by the tests
+                    cache.close()
+            self._install_session()
+            self._loaded = True
+
+    def _open_cache(self):
+        from .cache import SearchCache
+
+        # an existing json cache is migrated automatically to sqlite
+        cache = SearchCache(
+            "soundcloud.search.history", subfolder="common_play",
+            ttl=self.settings["cache_ttl"],
+            max_entries=self._limit("cache_max_entries"),
+            max_bytes=self._limit("cache_max_bytes"),
+            backend=self.settings["cache_backend"],
+            stale_if_error=self.settings["cache_stale_if_error"])
         if self.settings["refresh_cache"]:
-            self._search_cache.clear()
-            self._search_cache.store()
+            cache.clear()
+        cache.store()
+        return cache
+
+    def _install_session(self):
+        import nuvem_de_som
+
+        # nuvem_de_som can not be given a session, its requests module is
+        # swapped for one that goes through ours
+        self._session = pooled_session(self._limit("upstream_pool_size"),
+                                       self.settings["upstream_retries"],
+                                       self.settings["upstream_backoff"])
+        self._requests = install_session(nuvem_de_som, self._session)
+        self._client = nuvem_de_som
 
-        if "artists" not in self._search_cache:
-            self._search_cache["artists"] = {}
-        if "sets" not in self._search_cache:
-            self._search_cache["sets"] = {}
-        if "tracks" not in self._search_cache:
-            self._search_cache["tracks"] = {}
+    # metrics
+    def get_metrics(self) -> dict:
+        metrics = self._metrics.snapshot()
+        if self._search_cache is not None:
+            metrics["cache"] = self._search_cache.stats
+        metrics["memory"] = self.memory_usage()
+        return metrics
+
+    def memory_usage(self) -> dict:
+        usage = {"cache_bytes": self._search_cache.size_bytes
+                 if self._search_cache is not None else 0,
+                 "index_tracks": len(self._index),
+                 "index_trigrams": self._index.trigrams,
+                 "resolved_streams": len(self._streams)}
+        try:
+            import resource
+            # KiB on linux
+            usage["peak_rss_kib"] = resource.getrusage(
+                resource.RUSAGE_SELF).ru_maxrss
+        except ImportError:  # windows
+            pass
+        return usage
+
+    def handle_metrics(self, message: Message):
+        self.bus.emit(message.response(self.get_metrics()))
+
+    def emit_metrics_summary(self, message: Message = None):
+        LOG.info(f"soundcloud search metrics: {self._metrics.summary()}")
+        self.bus.emit(Message("ovos.soundcloud.metrics.summary",
+                              self.get_metrics()))
+
+    # cache warming
+    def _prefetch_candidates(self) -> List[Tuple[str, str]]:
+        self._ensure_loaded()
+        within = self.settings["prefetch_refresh_before"]
+        ttl = self._search_cache.ttl
+        queries = self._search_cache.expiring(
+            within, self.settings["prefetch_max_queries"])
+        for artist in self.settings["prefetch_artists"]:
+            query = ("artists", self.cache_key(artist, self.core_lang))
+            if query in queries:
+                continue
+            age = self._search_cache.age(*query)
+            if age is None or (ttl is not None and age > ttl - within):
+                queries.append(query)
+        return queries
+
+    def _prefetch(self, searchtype: str, phrase: str):
+        # phrase is a cache key, a fresh search replaces the entry,
+        # user searches for the same key join it instead of searching again
+        LOG.debug(f"prefetching soundcloud {searchtype} results for '{phrase}'")
+        self._metrics.incr(f"prefetch.{searchtype}")
+        self._refresh(searchtype, phrase)
+
+    def _refresh(self, searchtype: str, phrase: str):
+        for _ in self._inflight.run((searchtype, phrase), self._search_upstream,
+                                    phrase, searchtype, phrase, None,
+                                    refresh=True):
+            pass
+
+    # stale-while-revalidate
+    def _is_stale(self, searchtype: str, key: str) -> bool:
+        soft_ttl = self.settings["cache_soft_ttl"]
+        if not soft_ttl:
+            return False
+        age = self._search_cache.age(searchtype, key)
+        return age is not None and age > soft_ttl
+
+    def _revalidate(self, searchtype: str, key: str):
+        """ refresh a cache entry in the background, once at a time """
+        if self._breaker.is_open:
+            return  # it would fail, keep serving what we have
+        with self._revalidating_lock:
+            if (searchtype, key) in self._revalidating:
+                return
+            self._revalidating.add((searchtype, key))
+        LOG.debug(f"revalidating soundcloud {searchtype} results for '{key}'")
+        self._metrics.incr(f"revalidate.{searchtype}")
+        self._background.submit(self._run_revalidation, searchtype, key)
+
+    def _run_revalidation(self, searchtype: str, key: str):
+        try:
+            self._refresh(searchtype, key)
+        except Exception as e:
+            LOG.error(f"soundcloud {searchtype} revalidation failed: {e}")
+        finally:
+            with self._revalidating_lock:
+                self._revalidating.discard((searchtype, key))
+
+    # local index
+    def _load_index(self):
+        # tracks of previous sessions, from the cache
+        n = self._index.add(self._search_cache.tracks())
+        LOG.debug(f"indexed {n} cached soundcloud tracks")
+
+    def _index_results(self, phrase, searchtype,
+                       min_score=None) -> Iterable[PluginStream]:
+        scorer = self._scorer(phrase, searchtype)
+        for idx, (_, track) in enumerate(self._index.search(phrase)):
+            if self._durations.reject(track, songs=True):
+                continue
+            score = scorer.score(track, idx, min_score)
+            if score is None:
+                continue
+            self._metrics.incr(f"index.{searchtype}")
+            yield self._track2entry(phrase, track, searchtype, idx,
+                                    score=score)
+
+    def _offline_results(self, phrase,
+                         searchtype) -> Iterable[Union[PluginStream, Playlist]]:
+        if not self.settings["local_index"]:
+            return
+        if searchtype not in ("artists", "sets"):
+            yield from self._index_results(phrase, searchtype)
+            return
+        # no playlists are indexed, the tracks are grouped by artist
+        artists = {}
+        for _, track in self._index.search(phrase):
+            artists.setdefault(track["artist"], []).append(track)
+        scorer = self._scorer(phrase, searchtype)
+        for tracks in artists.values():
+            pl = self._build_playlist(phrase, "", tracks, searchtype,
+                                      Deadline(), scorer)
+            if pl:
+                self._metrics.incr(f"index.{searchtype}")
+                yield pl
+
+    # stream pre-resolution
+    @staticmethod
+    def _resolve_stream(url: str) -> str:
+        # the same extraction playback does for a "ydl" PluginStream
+        return PluginStream(stream=url, extractor_id="ydl").extract_uri(
+            video=False)
+
+    def _preresolve(self, results: List[Union[PluginStream, Playlist]]):
+        # the first stream of the best results is the one played
+        best = sorted(results, key=lambda r: r.match_confidence,
+                      reverse=True)[:self.settings["stream_preresolve_top"]]
+        urls = []
+        for r in best:
+            streams = self._playlist_streams(r) \
+                if isinstance(r, Playlist) else [r.stream]
+            urls += streams[:1]
+        n = self._resolver.submit(urls)
+        if n:
+            self._metrics.incr("streams.resolving", n)
+
+    def _playable(self, entry: Union[PluginStream, Playlist]
+                  ) -> Union[MediaEntry, PluginStream, Playlist]:
+        """ a still valid resolved stream is handed to playback as is,
+        instead of being extracted again """
+        if not isinstance(entry, PluginStream):
+            return entry
+        uri = self._streams.get(entry.stream)
+        if uri is None:
+            return entry
+        self._metrics.incr("streams.preresolved")
+        return MediaEntry(uri=uri, title=entry.title, artist=entry.artist,
+                          match_confidence=entry.match_confidence,
+                          skill_id=entry.skill_id,
+                          skill_icon=entry.skill_icon,
+                          playback=entry.playback,
+                          media_type=entry.media_type,
+                          length=entry.length, image=entry.image)
+
+    def cache_key(self, phrase: str, lang: str = None) -> str:
+        # "Piratech", "piratech " and "piratech on soundcloud"
+        # all share the same cache entry
+        # NOTE: without lang, self.lang digs the stack for the current message
+        return normalize_phrase(phrase, self.voc_list("soundcloud", lang))
 
     # score
     @staticmethod
     def calc_score(phrase, match, base_score=0, idx=0, searchtype="tracks"):
         # idx represents the order from soundcloud
-        score = base_score
-
-        title_score = 100 * fuzzy_match(
-            phrase.lower().strip(),
-            match["title"].lower().strip(),
-            strategy=MatchStrategy.DAMERAU_LEVENSHTEIN_SIMILARITY)
-        artist_score = 100 * fuzzy_match(
-            phrase.lower().strip(),
-            match["artist"].lower().strip(),
-            strategy=MatchStrategy.DAMERAU_LEVENSHTEIN_SIMILARITY)
-        if searchtype == "artists":
-            score += artist_score
-        elif searchtype == "tracks":
-            if artist_score >= 75:
-                score += artist_score * 0.5 + title_score * 0.5
-            else:
-                score += title_score * 0.85 + artist_score * 0.15
-            # TODO score penalty based on track length,
-            #  longer -> less likely to be a song
-            score -= idx * 2  # - 2% as we go down the results list
+        # to score many results against the same phrase use a QueryScorer
+        return QueryScorer(phrase, searchtype, base_score).score(match, idx)
+
+    def _scorer(self, phrase, searchtype) -> QueryScorer:
+        return QueryScorer(phrase, searchtype, durations=self._durations)
+
+    def _reject(self, track: dict, searchtype: str,
+                songs=False) -> Optional[str]:
+        """ duration rules, checked before the track is scored """
+        reason = self._durations.reject(track, songs)
+        if reason is not None:
+            self._metrics.incr(f"{reason}_filtered.{searchtype}")
+        return reason
+
+    def _track2entry(self, phrase, track, searchtype="tracks",
+                     idx=0, score=None) -> PluginStream:
+        if score is None:
+            score = self.calc_score(phrase, track, searchtype=searchtype,
+                                    idx=idx)
+        return PluginStream(
+            extractor_id="ydl",
+            stream=track["url"],
+            title=track["title"],
+            artist=track["artist"],
+            match_confidence=score,
+            media_type=MediaType.MUSIC,
+            playback=PlaybackType.AUDIO,
+            skill_id=self.skill_id,
+            skill_icon=self.skill_icon,
+            length=track["duration"] * 1000,  # seconds to milliseconds
+            image=track["image"],
+        )
+
+    def _lazy_entry(self, phrase, searchtype, scorer: QueryScorer,
+                    track: dict, idx: int) -> PluginStream:
+        with self._metrics.timer("score"):
+            score = scorer.score(track, idx)
+        with self._metrics.timer("entry"):
+            return self._track2entry(phrase, track, searchtype, idx,
+                                     score=score)
+
+    def _build_playlist(self, phrase, title, tracks, searchtype,
+                        deadline: Deadline,
+                        scorer: QueryScorer = None) -> LazyPlaylist:
+        scorer = scorer or self._scorer(phrase, searchtype)
+        valid = [v for v in tracks if not self._reject(v, searchtype)]
+        if self._limit("max_playlist_tracks"):
+            valid = valid[:self._limit("max_playlist_tracks")]
+        # only the first tracks are scored now, they score the playlist
+        n = self._limit("playlist_score_tracks") or len(valid)
+        pl = LazyPlaylist(title=title,
+                          factory=partial(self._lazy_entry, phrase,
+                                          searchtype, scorer))
+        scores = []
+        for idx, v in enumerate(valid[:n]):
+            if deadline.expired:
+                break  # partial playlist
+            entry = self._lazy_entry(phrase, searchtype, scorer, v, idx)
+            if not pl.title:
+                pl.title = entry.artist + " (Featured Tracks)"
+            pl.append(entry)
+            scores.append(entry.match_confidence)
         else:
-            if artist_score >= 85:
-                score += artist_score * 0.85 + title_score * 0.15
-            elif artist_score >= 70:
-                score += artist_score * 0.7 + title_score * 0.3
-            elif artist_score >= 50:
-                score += title_score * 0.5 + artist_score * 0.5
-            else:
-                score += title_score * 0.7 + artist_score * 0.3
+            pl.defer(valid[n:])
+        if scores:
+            pl.match_confidence = min((100, sum(scores) / len(scores)))
+        return pl
 
-        # LOG.debug(f"type: {searchtype} score: {score} artist:
-        # {match['artist']} title: {match['title']}")
-        score = min((100, score))
-        return score
+    def _cache2entry(self, data: dict, phrase: str, searchtype: str,
+                     scorer: QueryScorer) -> Union[PluginStream, Playlist]:
+        if "url" in data:
+            # nuvem_de_som track and its score
+            return self._track2entry(phrase, data, searchtype,
+                                     score=data["match_confidence"])
+        if "tracks" not in data:
+            return dict2entry(data)  # older cache format
+        # lightweight LazyPlaylist, entries are built when needed
+        return LazyPlaylist(title=data["title"], image=data["image"],
+                            match_confidence=data["match_confidence"],
+                            tracks=data["tracks"],
+                            factory=partial(self._lazy_entry, phrase,
+                                            searchtype, scorer))
 
-    def search_soundcloud(self, phrase, searchtype="tracks") -> Iterable[Union[PluginStream, Playlist]]:
+    @staticmethod
+    def _entry2cache(entry: Union[PluginStream, Playlist]) -> dict:
+        # skill_id, icon, extractor... are the same for every entry,
+        # only what is needed to rebuild it is cached
+        if isinstance(entry, LazyPlaylist):
+            return entry.as_lazy_dict
+        if isinstance(entry, PluginStream):
+            return dict(entry2track(entry),
+                        match_confidence=entry.match_confidence)
+        return entry.as_dict
+
+    def search_soundcloud(self, phrase, searchtype="tracks",
+                          lang=None) -> Iterable[Union[PluginStream, Playlist]]:
+        if self._prefetcher is not None:
+            self._prefetcher.notify_search()
+        self._ensure_loaded()
         # cache results for speed in repeat queries
-        if self.settings["cache"] and phrase in self._search_cache[searchtype]:
-            for r in self._search_cache[searchtype][phrase]:
-                yield dict2entry(r)
-        else:
-            try:
-                # NOTE: stream will be extracted again for playback
-                # but since they are not valid for very long this is needed
-                # otherwise on click/next/prev it will have expired
-                # it also means we can safely cache results!
-                results = []
-                if searchtype == "tracks":
-                    for r in SoundCloud.search_tracks(phrase):
-                        if r["duration"] <= 60:
-                            continue  # filter previews
-                        entry = PluginStream(
-                            extractor_id="ydl",
-                            stream=r["url"],
-                            title=r["title"],
-                            artist=r["artist"],
-                            match_confidence=self.calc_score(phrase, r,
-                                                             searchtype=searchtype,
-                                                             idx=len(results)),
-                            media_type=MediaType.MUSIC,
-                            playback=PlaybackType.AUDIO,
-                            skill_id=self.skill_id,
-                            skill_icon=self.skill_icon,
-                            length=r["duration"] * 1000,  # seconds to milliseconds
-                            image=r["image"],
-                        )
-                        yield entry
-                        results.append(entry)
-
-                elif searchtype == "artists":
-                    n = 0
-                    for a in SoundCloud.search_people(phrase):
-                        pl = Playlist(title="")
-                        for idx, v in enumerate(a["tracks"]):
-                            if v["duration"] <= 60:
-                                continue  # filter previews
-                            entry = PluginStream(
-                                extractor_id="ydl",
-                                stream=v["url"],
-                                title=v["title"],
-                                artist=v["artist"],
-                                match_confidence=self.calc_score(phrase, v,
-                                                                 searchtype="artists",
-                                                                 idx=idx),
-                                media_type=MediaType.MUSIC,
-                                playback=PlaybackType.AUDIO,
-                                skill_id=self.skill_id,
-                                skill_icon=self.skill_icon,
-                                length=v["duration"] * 1000,  # seconds to milliseconds
-                                image=v["image"],
-                            )
-                            if not pl.title:
-                                pl.title = entry.artist + " (Featured Tracks)"
-                            pl.append(entry)
-                        if not pl:
-                            continue
-                        conf = sum(e.match_confidence for e in pl) / len(pl)
-                        pl.match_confidence = min((100, conf))
-                        yield pl
-                        results.append(pl)
-
-                    n += 1
-
-                elif searchtype == "sets":
-                    n = 0
-                    for s in SoundCloud.search_sets(phrase):
-                        pl = Playlist(title=s["title"] + " (Playlist)")
-
-                        for idx, v in enumerate(s["tracks"]):
-                            if v["duration"] <= 60:
-                                continue  # filter previews
-
-                            entry = PluginStream(
-                                extractor_id="ydl",
-                                stream=v["url"],
-                                title=v["title"],
-                                artist=v["artist"],
-                                match_confidence=self.calc_score(phrase, v,
-                                                                 searchtype="sets",
-                                                                 idx=idx),
-                                media_type=MediaType.MUSIC,
-                                playback=PlaybackType.AUDIO,
-                                skill_id=self.skill_id,
-                                skill_icon=self.skill_icon,
-                                length=v["duration"] * 1000,  # seconds to milliseconds
-                                image=v["image"],
-                            )
-                            pl.append(entry)
-                        if not pl:
-                            continue
-                        yield pl
-                        results.append(pl)
-
-                    n += 1
+        key = self.cache_key(phrase, lang)
+        cached = None
+        if self.settings["cache"]:
+            with self._metrics.timer("cache.lookup"):
+                cached = self._search_cache.lookup(searchtype, key)
+        if cached is not None and cached["complete"]:
+            # past the soft ttl, served now and replaced for the next query
+            if self._is_stale(searchtype, key):
+                self._revalidate(searchtype, key)
+            scorer = self._scorer(phrase, searchtype)
+            for r in cached["results"]:
+                yield self._cache2entry(r, phrase, searchtype, scorer)
+            return
+        # known tracks are good candidates while soundcloud is searched
+        instant = set()
+        if self.settings["local_index"] and searchtype in ("tracks", "generic"):
+            for entry in self._index_results(
+                    phrase, searchtype, self.settings["local_index_min_score"]):
+                instant.add(entry.stream)
+                yield entry
+        # concurrent identical searches share a single upstream search,
+        # callers joining an in-flight search get the leader's results as-is:
+        # scored against the leader's phrase, and their own partial cache
+        # entry is ignored (it is the same entry the leader is topping up)
+        for entry in self._inflight.run((searchtype, key), self._search_upstream,
+                                        phrase, searchtype, key, cached):
+            if isinstance(entry, PluginStream) and entry.stream in instant:
+                continue
+            yield entry
+
+    def _search_upstream(self, phrase, searchtype, key, cached=None,
+                         refresh=False,
+                         limit=None) -> Iterable[Union[PluginStream, Playlist]]:
+        # limit replaces max_results and the early stop rules, see search_more
+        results = []
+        tracks = []  # for the local index
+        # the phrase is normalized once for every result
+        scorer = self._scorer(phrase, searchtype)
+        if cached is not None:
+            for r in cached["results"]:
+                entry = self._cache2entry(r, phrase, searchtype, scorer)
+                yield entry
+                results.append(entry)
+            LOG.debug(f"topping up soundcloud {searchtype} results "
+                      f"for '{key}'")
+        # every track is only yielded (and scored) once, in the first result
+        # that has it, including results from a partial cache entry
+        seen = set()
+        for e in results:
+            seen.update(self._entry_streams(e))
+        cached_results = len(results)
 
+        # every upstream call and playlist shares the same latency budget,
+        # whatever is not done by then is cancelled
+        deadline = Deadline(self.settings["search_timeout"])
+        upstream = f"upstream.{searchtype}"
+        complete = False
+        fetched = Event()  # soundcloud answered something
+        failed = False
+        max_results = self._limit("max_results", searchtype) \
+            if limit is None else limit
+        found = None  # upstream results
+        try:
+            if not self._breaker.allow():
+                raise CircuitOpen("soundcloud is unreachable")
+            # NOTE: stream will be extracted again for playback
+            # but since they are not valid for very long this is needed
+            # otherwise on click/next/prev it will have expired
+            # it also means we can safely cache results!
+            if searchtype in ("artists", "sets"):
+                if searchtype == "artists":
+                    search = SoundCloud.search_people
+                else:
+                    search = SoundCloud.search_sets
+                found = self._metrics.timed(upstream, self._upstream(
+                    search, phrase, deadline, fetched))
+                if searchtype == "artists":
+                    # "Piratech" and "piratech" are a single playlist
+                    found = merge_artists(found)
+                for s in found:
+                    if searchtype == "artists":
+                        title = ""  # named after the artist of the tracks
+                    else:
+                        title = s["title"] + " (Playlist)"
+                    tracks += s["tracks"]
+                    # tracks of previous playlists are dropped before scoring
+                    new = unseen_tracks(s["tracks"], seen)
+                    if len(new) < len(s["tracks"]):
+                        self._metrics.incr(f"duplicates.{searchtype}",
+                                           len(s["tracks"]) - len(new))
+                    if not new:
+                        continue
+                    pl = self._build_playlist(phrase, title, new,
+                                              searchtype, deadline, scorer)
+                    if not pl:
+                        continue
+                    if deadline.expired:
+                        # only yield a partial playlist if it is good enough
+                        # it is not cached, the next query will refetch it
+                        if pl.match_confidence >= self.settings["min_partial_confidence"]:
+                            yield pl
+                        raise DeadlineExceeded(searchtype)
+                    results.append(pl)
+                    yield pl
+                    if self._search_done(searchtype, results, max_results,
+                                         early_stop=limit is None):
+                        break  # no more pages are fetched
+            else:
+                if searchtype == "tracks":
+                    search = SoundCloud.search_tracks
                 else:
-                    for r in SoundCloud.search(phrase):
-                        if r["duration"] < 60:
-                            continue  # filter previews
-                        entry = PluginStream(
-                            extractor_id="ydl",
-                            stream=r["url"],
-                            title=r["title"],
-                            artist=r["artist"],
-                            match_confidence=self.calc_score(phrase, r,
-                                                             searchtype=searchtype,
-                                                             idx=len(results)),
-                            media_type=MediaType.MUSIC,
-                            playback=PlaybackType.AUDIO,
-                            skill_id=self.skill_id,
-                            skill_icon=self.skill_icon,
-                            length=r["duration"] * 1000,  # seconds to milliseconds
-                            image=r["image"],
-                        )
-                        yield entry
-                        results.append(entry)
+                    search = SoundCloud.search
+                found = self._metrics.timed(upstream, self._upstream(
+                    search, phrase, deadline, fetched))
+                for r in found:
+                    reason = self._reject(r, searchtype, songs=True)
+                    if reason == "long_tracks":
+                        tracks.append(r)  # indexed, only not a result
+                    if reason is not None:
+                        continue
+                    tracks.append(r)
+                    if r["url"] in seen:
+                        self._metrics.incr(f"duplicates.{searchtype}")
+                        continue
+                    seen.add(r["url"])
+                    idx = len(results)
+                    with self._metrics.timer("score"):
+                        score = scorer.score(r, idx)
+                    with self._metrics.timer("entry"):
+                        entry = self._track2entry(phrase, r, searchtype, idx,
+                                                  score=score)
+                    results.append(entry)
+                    yield entry
+                    if self._search_done(searchtype, results, max_results,
+                                         early_stop=limit is None):
+                        break
+            complete = True
+            self._breaker.success()
+        except DeadlineExceeded:
+            self._metrics.incr(f"timeouts.{searchtype}")
+            LOG.debug(f"soundcloud {searchtype} search exceeded "
+                      f"{deadline.timeout}s, {len(results)} results")
+            if not fetched.is_set():
+                self._breaker.failure()  # not even a partial answer
+                failed = True
+        except CircuitOpen:
+            self._metrics.incr(f"circuit_open.{searchtype}")
+            LOG.debug(f"soundcloud is unreachable, not searching {searchtype}")
+            failed = True
+        except Exception as e:
+            self._metrics.incr(f"errors.{searchtype}")
+            LOG.error(f"soundcloud {searchtype} search failed: {e}")
+            self._breaker.failure()
+            failed = True
+        finally:
+            if not (fetched.is_set() or complete or failed):
+                # abandoned before soundcloud answered, no outcome
+                self._breaker.cancel()
+            if found is not None:
+                found.close()  # cancels the upstream search
+            if self.settings["local_index"]:
+                # previews are never results
+                self._index.add(t for t in tracks
+                                if self._durations.reject(t) is None)
+            # also runs if the caller stops iterating early (GeneratorExit),
+            # partial results still warm the cache and are topped up later,
+            # unless they would replace a full entry being refreshed, or
+            # there is nothing new (it would look freshly fetched)
+            if self.settings["cache"] and (
+                    complete or (len(results) > cached_results and
+                                 not refresh)):
+                if not complete:
+                    LOG.debug(f"caching partial soundcloud {searchtype} "
+                              f"results for '{key}'")
+                with self._metrics.timer("store"):
+                    self._search_cache.put(searchtype, key,
+                                           [self._entry2cache(e)
+                                            for e in results],
+                                           complete=complete)
+                    self._search_cache.store()
+            if self.settings["metrics_log"]:
+                LOG.debug(f"soundcloud {searchtype} search '{key}': "
+                          f"{len(results)} results in "
+                          f"{deadline.elapsed * 1000:.1f}ms, "
+                          f"{self._metrics.summary()}")
+        if failed and not results and not refresh:
+            # not cached, a fresh search replaces it once soundcloud is back
+            stale = False
+            for entry in self._stale_results(phrase, searchtype, key):
+                stale = True
+                yield entry
+            if not stale:
+                yield from self._offline_results(phrase, searchtype)
+
+    def _search_done(self, searchtype, results, max_results,
+                     early_stop=True) -> bool:
+        """ enough results, no more pages need to be fetched """
+        if max_results and len(results) >= max_results:
+            return True
+        if not early_stop:
+            return False
+        enough = self.settings["early_stop_results"]
+        if enough:
+            confident = sum(r.match_confidence >=
+                            self.settings["early_stop_confidence"]
+                            for r in results)
+            if confident >= enough:
+                self._metrics.incr(f"early_stop.{searchtype}")
+                return True
+        floor = self.settings["min_track_score"]
+        # scores are at most 100, minus 2 per position for tracks
+        if floor and searchtype == "tracks" and 100 - 2 * len(results) < floor:
+            self._metrics.incr(f"early_stop.{searchtype}")
+            return True
+        return False
+
+    def search_more(self, phrase, searchtype="tracks", lang=None,
+                    offset=None) -> Iterable[Union[PluginStream, Playlist]]:
+        """ "fetch more", the results of a search after the first ``offset``
+        ones the caller has, by default the ones cached already """
+        self._ensure_loaded()
+        key = self.cache_key(phrase, lang)
+        cached = None
+        if self.settings["cache"]:
+            cached = self._search_cache.lookup(searchtype, key, stale=True)
+        if offset is None:
+            offset = len(cached["results"]) if cached is not None else 0
+        self._metrics.incr(f"more.{searchtype}")
+        # nuvem_de_som can not resume a search, the pages already seen are
+        # fetched again but their tracks are not scored again
+        for idx, entry in enumerate(self._inflight.run(
+                (searchtype, key, "more"), self._search_upstream, phrase,
+                searchtype, key, cached,
+                limit=offset + self.settings["more_results"])):
+            if idx >= offset:
+                yield entry
+
+    def handle_search_more(self, message: Message):
+        phrase = message.data["phrase"]
+        searchtype = message.data.get("searchtype", "tracks")
+        lang = message.data.get("lang") or self.lang
+        # results the caller has already, else the cached ones
+        offset = message.data.get("offset")
+        results = [r.as_dict for r in self.search_more(phrase, searchtype,
+                                                        lang=lang,
+                                                        offset=offset)]
+        self.bus.emit(message.response({"phrase": phrase,
+                                        "searchtype": searchtype,
+                                        "results": results}))
+
+    def _upstream(self, search, phrase, deadline: Deadline,
+                  fetched: Event) -> Iterable[dict]:
+        # searches failing before any result are retried within the budget,
+        # the pooled session already retries the individual requests
+        if self._upstream_slots is not None:
+            search = partial(self._bounded, search, deadline)
+        found = iterate_until(partial(retrying, search,
+                                      backoff=self.settings["upstream_backoff"],
+                                      deadline=deadline),
+                              phrase, deadline=deadline,
+                              readahead=UPSTREAM_READAHEAD)
+        try:
+            for item in found:
+                if not fetched.is_set():
+                    # closes the circuit (or ends a half open trial) even if
+                    # the search is abandoned or times out later
+                    fetched.set()
+                    self._breaker.success()
+                yield item
+        finally:
+            found.close()
+
+    def _bounded(self, search, deadline: Deadline, phrase) -> Iterable[dict]:
+        # at most upstream_concurrency soundcloud searches run at once
+        if not self._upstream_slots.acquire(timeout=deadline.remaining):
+            raise DeadlineExceeded("waiting for an upstream slot")
+        try:
+            yield from search(phrase)
+        finally:
+            self._upstream_slots.release()
+
+    def _stale_results(self, phrase, searchtype,
+                       key) -> Iterable[Union[PluginStream, Playlist]]:
+        if not self.settings["cache"]:
+            return
+        cached = self._search_cache.lookup(searchtype, key, stale=True)
+        if cached is None:
+            return
+        LOG.info(f"serving stale soundcloud {searchtype} results for '{key}'")
+        self._metrics.incr(f"stale.{searchtype}")
+        scorer = self._scorer(phrase, searchtype)
+        for r in cached["results"]:
+            yield self._cache2entry(r, phrase, searchtype, scorer)
+
+    @classmethod
+    def _entry_streams(cls, entry: Union[PluginStream, Playlist]) -> List[str]:
+        if isinstance(entry, Playlist):
+            return cls._playlist_streams(entry)
+        return [cls._stream_url(entry)]
+
+    @classmethod
+    def _playlist_streams(cls, pl: Playlist) -> List[str]:
+        if isinstance(pl, LazyPlaylist):
+            return pl.streams  # without building the entries
+        return [cls._stream_url(e) for e in pl]
+
+    @staticmethod
+    def _stream_url(entry) -> str:
+        return getattr(entry, "stream", None) or entry.uri
+
+    def search_parallel(self, phrase, media_type=MediaType.GENERIC,
+                        searchtypes=SEARCH_TYPES, timeout=4,
+                        lang=None) -> Iterable[Union[PluginStream, Playlist]]:
+        """run several searchtypes concurrently with a shared deadline,
+        results are yielded as they arrive and whatever did not finish in
+        time is dropped
+
+        results are deduplicated by stream url, a track is only yielded once
+        either on its own or inside the first playlist that contains it,
+        later playlists are yielded without tracks seen before"""
+        deadline = Deadline(timeout)
+        # the message can not be found from the worker threads
+        lang = lang or self.lang
+        results = Queue()
+        done = object()
+
+        def worker(searchtype):
+            try:
+                for r in getattr(self, f"search_{searchtype}")(
+                        phrase, media_type, lang=lang):
+                    results.put(r)
             except Exception as e:
-                return []
-            if self.settings["cache"]:
-                self._search_cache[searchtype][phrase] = [e.as_dict for e in results]
-                self._search_cache.store()
+                self._metrics.incr(f"errors.{searchtype}")
+                LOG.error(f"soundcloud {searchtype} search failed: {e}")
+            finally:
+                results.put(done)
+
+        for searchtype in searchtypes:
+            self._executor.submit(worker, searchtype)
+
+        pending = len(searchtypes)
+        seen = set()
+        while pending:
+            try:
+                r = results.get(timeout=deadline.remaining)
+            except Empty:
+                LOG.debug(f"soundcloud search timed out, "
+                          f"{pending} searchtypes did not finish")
+                break
+            if r is done:
+                pending -= 1
+                continue
+            if isinstance(r, Playlist):
+                streams = self._playlist_streams(r)
+                if all(s in seen for s in streams):
+                    continue
+                if any(s in seen for s in streams):
+                    tracks = [e for e in r if self._stream_url(e) not in seen]
+                    # entries are shared with other callers, copy
+                    r = Playlist(tracks, title=r.title, artist=r.artist,
+                                 image=r.image,
+                                 match_confidence=r.match_confidence,
+                                 skill_id=r.skill_id, skill_icon=r.skill_icon,
+                                 playback=r.playback, media_type=r.media_type)
+                seen.update(streams)
+            elif r.stream in seen:
+                continue
+            else:
+                seen.add(r.stream)
+            yield r
 
     @ocp_search()
-    def search_artists(self, phrase, media_type=MediaType.GENERIC) -> Iterable[Playlist]:
+    def search_ocp(self, phrase, media_type=MediaType.GENERIC) -> Iterable[Union[PluginStream, Playlist]]:
+        searchtypes = [t for t in self.settings["search_types"]
+                       if t in SEARCH_TYPES]
+        if len(searchtypes) != len(self.settings["search_types"]):
+            LOG.warning(f"ignoring invalid soundcloud search_types: "
+                        f"{self.settings['search_types']}, "
+                        f"valid values are {SEARCH_TYPES}")
+        if not searchtypes:
+            searchtypes = ["artists"]
+        # resolved once, finding the message language is not cheap
+        lang = self.lang
+        if len(searchtypes) == 1:
+            results = getattr(self, f"search_{searchtypes[0]}")(
+                phrase, media_type, lang=lang)
+        else:
+            results = self.search_parallel(phrase, media_type, searchtypes,
+                                           timeout=self.settings["search_timeout"],
+                                           lang=lang)
+        if self._resolver is None:
+            yield from results
+            return
+        seen = []
+        try:
+            for r in results:
+                seen.append(r)
+                yield self._playable(r)
+        finally:
+            # also when OCP stops early, it has what it is going to play
+            self._preresolve(seen)
+
+    def search_artists(self, phrase, media_type=MediaType.GENERIC,
+                       lang=None) -> Iterable[Playlist]:
+        lang = lang or self.lang
         # match the request media_type
         base_score = 0
         if media_type == MediaType.MUSIC:
             base_score += 15
 
-        if self.voc_match(phrase, "soundcloud"):
+        if self.voc_match(phrase, "soundcloud", lang=lang):
             # explicitly requested soundcloud
             base_score += 50
-            phrase = self.remove_voc(phrase, "soundcloud")
+            phrase = self.remove_voc(phrase, "soundcloud", lang=lang)
 
         LOG.debug("searching soundcloud artists")
-        for pl in self.search_soundcloud(phrase, "artists"):
+        for pl in self.search_soundcloud(phrase, "artists", lang=lang):
             yield pl
 
-    #@ocp_search()
-    def search_sets(self, phrase, media_type=MediaType.GENERIC) -> Iterable[Playlist]:
+    def search_sets(self, phrase, media_type=MediaType.GENERIC,
+                    lang=None) -> Iterable[Playlist]:
+        lang = lang or self.lang
         # match the request media_type
         base_score = 0
         if media_type == MediaType.MUSIC:
             base_score += 15
 
-        if self.voc_match(phrase, "soundcloud"):
+        if self.voc_match(phrase, "soundcloud", lang=lang):
             # explicitly requested soundcloud
             base_score += 30
-            phrase = self.remove_voc(phrase, "soundcloud")
+            phrase = self.remove_voc(phrase, "soundcloud", lang=lang)
 
         LOG.debug("searching soundcloud sets")
-        for pl in self.search_soundcloud(phrase, "sets"):
+        for pl in self.search_soundcloud(phrase, "sets", lang=lang):
             yield pl
 
-    #@ocp_search()
-    def search_tracks(self, phrase, media_type=MediaType.GENERIC) -> Iterable[PluginStream]:
+    def search_tracks(self, phrase, media_type=MediaType.GENERIC,
+                      lang=None) -> Iterable[PluginStream]:
+        lang = lang or self.lang
         # match the request media_type
         base_score = 0
         if media_type == MediaType.MUSIC:
             base_score += 10
 
-        if self.voc_match(phrase, "soundcloud"):
+        if self.voc_match(phrase, "soundcloud", lang=lang):
             # explicitly requested soundcloud
             base_score += 30
-            phrase = self.remove_voc(phrase, "soundcloud")
+            phrase = self.remove_voc(phrase, "soundcloud", lang=lang)
 
         LOG.debug("searching soundcloud tracks")
-        for r in self.search_soundcloud(phrase, searchtype="tracks"):
+        for r in self.search_soundcloud(phrase, searchtype="tracks",
+                                        lang=lang):
+            # previews and podcasts are filtered before scoring, see
+            # min_track_duration and max_track_duration
             score = r.match_confidence
             if score < 35:
                 continue
-            # crude attempt at filtering non music / preview tracks
-            if r.length < 60:
-                continue
-            # we might still get podcasts, would be nice to handle that better
-            if r.length > 60 * 45:  # >45 min is probably not music :shrug:
-                continue
             yield r
 
 
@@ -0,0 +1,764 @@
+import json
+import sqlite3
+import sys
+import time
+from collections import Counter, OrderedDict
+from os import makedirs, rename
+from os.path import dirname, getmtime, isfile, join
+from threading import RLock
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from json_database import JsonStorageXDG
+from ovos_utils.log import LOG
+from ovos_utils.xdg_utils import xdg_cache_home
+
+# (searchtype, phrase, created, accessed, size)
+IndexRow = Tuple[str, str, float, float, int]
+# nuvem_de_som track fields, besides "url", stored once per track
+TRACK_FIELDS = ("title", "artist", "duration", "image")
+# url -> [title, artist, duration, image]
+TrackRows = Dict[str, list]
+
+
+class CacheBackend:
+    """ storage for SearchCache entries
+
+    an entry is a dict with "created", "accessed", "complete" and "results"
+    keys, SearchCache only keeps the index in memory and asks the backend for
+    results on a hit
+
+    tracks are sized as ``len(url) + len(json.dumps(row))``, writes return
+    how much the stored tracks grew or shrank so SearchCache does not have
+    to measure them again
+    """
+
+    def load_index(self) -> Iterable[IndexRow]:
+        raise NotImplementedError
+
+    def get(self, searchtype: str, phrase: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    def put(self, searchtype: str, phrase: str, entry: dict) -> int:
+        """ returns the size of the tracks only the replaced entry used,
+        they are deleted """
+        raise NotImplementedError
+
+    def touch(self, searchtype: str, phrase: str, accessed: float):
+        raise NotImplementedError
+
+    def delete(self, searchtype: str, phrase: str) -> int:
+        """ returns the size of the tracks only this entry used, they are
+        deleted too """
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def put_tracks(self, tracks: TrackRows) -> int:
+        """ returns how much the stored tracks grew """
+        raise NotImplementedError
+
+    def get_tracks(self, urls: Iterable[str]) -> TrackRows:
+        raise NotImplementedError
+
+    def iter_tracks(self) -> Iterable[Tuple[str, list]]:
+        """ (url, row) of every stored track """
+        raise NotImplementedError
+
+    def prune_tracks(self) -> int:
+        """ delete tracks no entry refers to, returns how many, a full scan
+        for cleaning up after older versions """
+        raise NotImplementedError
+
+    def tracks_size(self) -> int:
+        raise NotImplementedError
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.flush()
+
+
+class JsonCacheBackend(CacheBackend):
+    """ whole cache in a single json file, rewritten on every flush
+
+    tracks are stored under the "_tracks" key, the entries using each of
+    them are counted in memory
+    """
+    TRACKS = "_tracks"
+
+    def __init__(self, name="soundcloud.search.history",
+                 subfolder="common_play", xdg_folder=None):
+        self._db = JsonStorageXDG(name, subfolder=subfolder,
+                                  xdg_folder=xdg_folder or xdg_cache_home())
+        self._dirty = False
+        self._users = Counter()  # url -> entries using the track
+        for entry in self._entries():
+            self._users.update(_refs(entry.get("results", [])))
+
+    def _entries(self) -> Iterable[dict]:
+        for searchtype, phrases in self._db.items():
+            if searchtype != self.TRACKS and isinstance(phrases, dict):
+                for entry in phrases.values():
+                    if isinstance(entry, dict):
+                        yield entry
+
+    def _release(self, entry: Optional[dict]) -> int:
+        # tracks only used by entry are deleted
+        if not isinstance(entry, dict):
+            return 0
+        rows = self._db.get(self.TRACKS, {})
+        freed = 0
+        for url in _refs(entry.get("results", [])):
+            self._users[url] -= 1
+            if self._users[url] <= 0:
+                del self._users[url]
+                if url in rows:
+                    freed += _track_size(url, rows.pop(url))
+        return freed
+
+    @property
+    def path(self) -> str:
+        return self._db.path
+
+    def load_index(self) -> Iterable[IndexRow]:
+        for searchtype, phrases in self._db.items():
+            if not isinstance(phrases, dict) or searchtype == self.TRACKS:
+                continue
+            for phrase, entry in phrases.items():
+                if not isinstance(entry, dict):
+                    # legacy format, plain list of results without
+                    # timestamps, as old as the file's last write
+                    mtime = getmtime(self.path)
+                    entry = {"created": mtime, "accessed": mtime,
+                             "results": entry}
+                    phrases[phrase] = entry
+                    self._dirty = True
+                yield (searchtype, phrase,
+                       entry.get("created", 0), entry.get("accessed", 0),
+                       len(json.dumps(entry["results"])))
+
+    def get(self, searchtype: str, phrase: str) -> Optional[dict]:
+        return self._db.get(searchtype, {}).get(phrase)
+
+    def put(self, searchtype: str, phrase: str, entry: dict) -> int:
+        if searchtype not in self._db:
+            self._db[searchtype] = {}
+        self._users.update(_refs(entry["results"]))
+        old = self._db[searchtype].get(phrase)
+        self._db[searchtype][phrase] = entry
+        self._dirty = True
+        return self._release(old)
+
+    def touch(self, searchtype: str, phrase: str, accessed: float):
+        entry = self.get(searchtype, phrase)
+        if entry is not None:
+            entry["accessed"] = accessed
+            self._dirty = True
+
+    def delete(self, searchtype: str, phrase: str) -> int:
+        entry = self._db.get(searchtype, {}).pop(phrase, None)
+        if entry is None:
+            return 0
+        self._dirty = True
+        return self._release(entry)
+
+    def clear(self):
+        self._db.clear()
+        self._users.clear()
+        self._dirty = True
+
+    def put_tracks(self, tracks: TrackRows) -> int:
+        if not tracks:
+            return 0
+        rows = self._db.setdefault(self.TRACKS, {})
+        grown = 0
+        for url, row in tracks.items():
+            if url in rows:
+                grown -= _track_size(url, rows[url])
+            rows[url] = row
+            grown += _track_size(url, row)
+        self._dirty = True
+        return grown
+
+    def get_tracks(self, urls: Iterable[str]) -> TrackRows:
+        rows = self._db.get(self.TRACKS, {})
+        return {url: rows[url] for url in urls if url in rows}
+
+    def iter_tracks(self) -> Iterable[Tuple[str, list]]:
+        return list(self._db.get(self.TRACKS, {}).items())
+
+    def prune_tracks(self) -> int:
+        rows = self._db.get(self.TRACKS, {})
+        unused = [url for url in rows if url not in self._users]
+        for url in unused:
+            rows.pop(url)
+        if unused:
+            self._dirty = True
+        return len(unused)
+
+    def tracks_size(self) -> int:
+        return sum(_track_size(url, row)
+                   for url, row in self._db.get(self.TRACKS, {}).items())
+
+    def flush(self):
+        if self._dirty:
+            self._db.store()
+            self._dirty = False
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """ one row per cached search, a new entry costs a single small write
+
+    the database runs in WAL mode, access times are batched in memory and
+    written on flush or together with the next insert
+
+    tracks are stored once in their own table, "refs" maps entries to the
+    tracks they use so the ones an entry leaves unused are deleted with it
+    """
+
+    def __init__(self, name="soundcloud.search.history",
+                 subfolder="common_play", xdg_folder=None):
+        folder = join(xdg_folder or xdg_cache_home(), subfolder)
+        makedirs(folder, exist_ok=True)
+        self.path = join(folder, f"{name}.sqlite")
+        self._lock = RLock()
+        self._touched: Dict[Tuple[str, str], float] = {}
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "searchtype TEXT NOT NULL, phrase TEXT NOT NULL, "
+            "created REAL NOT NULL, accessed REAL NOT NULL, "
+            "size INTEGER NOT NULL, results TEXT NOT NULL, "
+            "complete INTEGER NOT NULL DEFAULT 1, "
+            "PRIMARY KEY (searchtype, phrase))")
+        columns = [c[1] for c in
+                   self._conn.execute("PRAGMA table_info(entries)")]
+        if "complete" not in columns:
+            self._conn.execute("ALTER TABLE entries ADD COLUMN "
+                               "complete INTEGER NOT NULL DEFAULT 1")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS tracks ("
+            "url TEXT PRIMARY KEY, data TEXT NOT NULL)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS refs ("
+            "searchtype TEXT NOT NULL, phrase TEXT NOT NULL, "
+            "url TEXT NOT NULL)")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS refs_entry ON refs (searchtype, phrase)")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS refs_url ON refs (url)")
+        self._conn.commit()
+
+    def load_index(self) -> Iterable[IndexRow]:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT searchtype, phrase, created, accessed, size "
+                "FROM entries").fetchall()
+
+    def get(self, searchtype: str, phrase: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT created, accessed, results, complete FROM entries "
+                "WHERE searchtype=? AND phrase=?",
+                (searchtype, phrase)).fetchone()
+        if row is None:
+            return None
+        return {"created": row[0], "accessed": row[1],
+                "results": json.loads(row[2]), "complete": bool(row[3])}
+
+    def put(self, searchtype: str, phrase: str, entry: dict) -> int:
+        results = json.dumps(entry["results"])
+        with self._lock:
+            self._touched.pop((searchtype, phrase), None)
+            self._write_touched()
+            old = self._entry_refs(searchtype, phrase)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (searchtype, phrase, entry["created"], entry["accessed"],
+                 len(results), results, int(entry.get("complete", True))))
+            self._conn.execute(
+                "DELETE FROM refs WHERE searchtype=? AND phrase=?",
+                (searchtype, phrase))
+            self._conn.executemany(
+                "INSERT INTO refs VALUES (?, ?, ?)",
+                [(searchtype, phrase, url)
+                 for url in _refs(entry["results"])])
+            freed = self._release(old)
+            self._conn.commit()
+        return freed
+
+    def _entry_refs(self, searchtype: str, phrase: str) -> List[str]:
+        return [url for url, in self._conn.execute(
+            "SELECT url FROM refs WHERE searchtype=? AND phrase=?",
+            (searchtype, phrase))]
+
+    def _release(self, urls: List[str]) -> int:
+        # of the tracks an entry used, delete the ones nothing uses anymore
+        freed = 0
+        for i in range(0, len(urls), 500):
+            chunk = urls[i:i + 500]
+            unused = self._conn.execute(
+                "SELECT url, LENGTH(url) + LENGTH(data) FROM tracks "
+                f"WHERE url IN ({','.join('?' * len(chunk))}) AND NOT EXISTS "
+                "(SELECT 1 FROM refs WHERE refs.url = tracks.url)",
+                chunk).fetchall()
+            self._conn.executemany("DELETE FROM tracks WHERE url=?",
+                                   [(url,) for url, _ in unused])
+            freed += sum(size for _, size in unused)
+        return freed
+
+    def touch(self, searchtype: str, phrase: str, accessed: float):
+        with self._lock:
+            self._touched[(searchtype, phrase)] = accessed
+
+    def delete(self, searchtype: str, phrase: str) -> int:
+        with self._lock:
+            self._touched.pop((searchtype, phrase), None)
+            old = self._entry_refs(searchtype, phrase)
+            self._conn.execute(
+                "DELETE FROM entries WHERE searchtype=? AND phrase=?",
+                (searchtype, phrase))
+            self._conn.execute(
+                "DELETE FROM refs WHERE searchtype=? AND phrase=?",
+                (searchtype, phrase))
+            freed = self._release(old)
+            self._conn.commit()
+        return freed
+
+    def clear(self):
+        with self._lock:
+            self._touched.clear()
+            self._conn.execute("DELETE FROM entries")
+            self._conn.execute("DELETE FROM refs")
+            self._conn.execute("DELETE FROM tracks")
+            self._conn.commit()
+
+    def put_tracks(self, tracks: TrackRows) -> int:
+        rows = [(url, json.dumps(row)) for url, row in tracks.items()]
+        urls = list(tracks)
+        with self._lock:
+            grown = sum(len(url) + len(data) for url, data in rows)
+            for i in range(0, len(urls), 500):
+                chunk = urls[i:i + 500]
+                grown -= self._conn.execute(
+                    "SELECT SUM(LENGTH(url) + LENGTH(data)) FROM tracks "
+                    f"WHERE url IN ({','.join('?' * len(chunk))})",
+                    chunk).fetchone()[0] or 0
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO tracks VALUES (?, ?)", rows)
+            self._conn.commit()
+        return grown
+
+    def get_tracks(self, urls: Iterable[str]) -> TrackRows:
+        urls = list(urls)
+        rows = {}
+        with self._lock:
+            # stay below the default SQLITE_MAX_VARIABLE_NUMBER
+            for i in range(0, len(urls), 500):
+                chunk = urls[i:i + 500]
+                rows.update(
+                    (url, json.loads(data)) for url, data in
+                    self._conn.execute(
+                        "SELECT url, data FROM tracks WHERE url IN "
+                        f"({','.join('?' * len(chunk))})", chunk))
+        return rows
+
+    def iter_tracks(self) -> Iterable[Tuple[str, list]]:
+        with self._lock:
+            rows = self._conn.execute("SELECT url, data FROM tracks").fetchall()
+        return [(url, json.loads(data)) for url, data in rows]
+
+    def prune_tracks(self) -> int:
+        with self._lock:
+            n = self._conn.execute(
+                "DELETE FROM tracks WHERE url NOT IN "
+                "(SELECT url FROM refs)").rowcount
+            self._conn.commit()
+        return n
+
+    def tracks_size(self) -> int:
+        with self._lock:
+            size = self._conn.execute(
+                "SELECT SUM(LENGTH(url) + LENGTH(data)) FROM tracks"
+            ).fetchone()[0]
+        return size or 0
+
+    def _write_touched(self):
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE entries SET accessed=? WHERE searchtype=? AND phrase=?",
+                [(t, s, p) for (s, p), t in self._touched.items()])
+            self._touched.clear()
+
+    def flush(self):
+        with self._lock:
+            self._write_touched()
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            if self._conn is None:
+                return  # skills are shutdown again when garbage collected
+            self.flush()
+            self._conn.close()
+            self._conn = None
+
+    def migrate_json(self, json_path: str) -> int:
+        """ import entries from a JsonCacheBackend file,
+        the file is renamed afterwards so this only happens once """
+        if not isfile(json_path):
+            return 0
+        mtime = getmtime(json_path)
+        n = 0
+        with self._lock:
+            for searchtype, phrases in _load_json(json_path).items():
+                if not isinstance(phrases, dict):
+                    continue
+                if searchtype == JsonCacheBackend.TRACKS:
+                    self.put_tracks(phrases)
+                    continue
+                for phrase, entry in phrases.items():
+                    if not isinstance(entry, dict):
+                        entry = {"results": entry}
+                    if not entry.get("created"):
+                        # legacy format, plain list of results without
+                        # timestamps, as old as the file's last write
+                        entry["created"] = mtime
+                        entry["accessed"] = mtime
+                    self.put(searchtype, phrase, entry)
+                    n += 1
+        rename(json_path, json_path + ".migrated")
+        LOG.info(f"migrated {n} soundcloud cache entries to {self.path}")
+        return n
+
+
+def _track_size(url: str, row: list) -> int:
+    return len(url) + len(json.dumps(row))
+
+
+def _is_track(result) -> bool:
+    return isinstance(result, dict) and "url" in result and \
+        all(f in result for f in TRACK_FIELDS)
+
+
+def _refs(results: List[dict]) -> Set[str]:
+    """ urls of the tracks used by packed results """
+    urls = set()
+    for r in results:
+        if "ref" in r:
+            urls.add(r["ref"])
+        elif "refs" in r:
+            urls.update(r["refs"])
+    return urls
+
+
+def _pack(results: List[dict]) -> Tuple[List[dict], TrackRows]:
+    """ move nuvem_de_som tracks out of the results, they are replaced by
+    their url ("ref" for a track, "refs" for the "tracks" of a playlist)
+    and stored once """
+    tracks: TrackRows = {}
+
+    def store(track: dict) -> str:
+        tracks[track["url"]] = [track[f] for f in TRACK_FIELDS]
+        return track["url"]
+
+    packed = []
+    for r in results:
+        if _is_track(r):
+            extra = {k: v for k, v in r.items()
+                     if k != "url" and k not in TRACK_FIELDS}
+            packed.append(dict(extra, ref=store(r)))
+        elif isinstance(r, dict) and isinstance(r.get("tracks"), list) and \
+                all(_is_track(t) for t in r["tracks"]):
+            packed.append({k: v for k, v in r.items() if k != "tracks"})
+            packed[-1]["refs"] = [store(t) for t in r["tracks"]]
+        else:
+            packed.append(r)  # stored as is
+    return packed, tracks
+
+
+def _track(url: str, row: list) -> dict:
+    track = dict(zip(TRACK_FIELDS, row))
+    # the same artist repeats for every track of a playlist
+    track["artist"] = sys.intern(track["artist"])
+    track["url"] = url
+    return track
+
+
+def _unpack(results: List[dict], rows: TrackRows) -> List[dict]:
+    unpacked = []
+    for r in results:
+        if "ref" in r:
+            if r["ref"] not in rows:
+                continue  # deleted track
+            track = _track(r["ref"], rows[r["ref"]])
+            track.update((k, v) for k, v in r.items() if k != "ref")
+            unpacked.append(track)
+        elif "refs" in r:
+            r = dict(r)
+            r["tracks"] = [_track(url, rows[url]) for url in r.pop("refs")
+                           if url in rows]
+            unpacked.append(r)
+        else:
+            unpacked.append(r)
+    return unpacked
+
+
+def _load_json(path: str) -> dict:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        LOG.error(f"failed to load soundcloud cache {path}: {e}")
+        return {}
+
+
+class SearchCache:
+    """ persistent cache of soundcloud search results
+
+    entries are namespaced by searchtype ("artists", "sets", "tracks"...),
+    expire ``ttl`` seconds after being fetched and the least recently used
+    entries are evicted once ``max_entries`` or ``max_bytes`` is exceeded
+
+    expired entries are kept for another ``stale_if_error`` seconds, they
+    are only returned by ``lookup(..., stale=True)``, eg. while soundcloud
+    is unreachable
+
+    results are lists of dicts, nuvem_de_som tracks (title, artist, url,
+    duration and image) in them or in the "tracks" list of a playlist are
+    stored once for all entries and namespaces
+    """
+
+    backends = {"json": JsonCacheBackend,
+                "sqlite": SQLiteCacheBackend}
+
+    def __init__(self, name="soundcloud.search.history",
+                 subfolder="common_play", ttl=7 * 24 * 60 * 60,
+                 max_entries=1000, max_bytes=5 * 1024 * 1024,
+                 backend="sqlite", xdg_folder=None, stale_if_error=0):
+        self.ttl = ttl
+        self.stale_if_error = stale_if_error
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = RLock()
+        if isinstance(backend, str):
+            backend = self.backends[backend](name, subfolder=subfolder,
+                                             xdg_folder=xdg_folder)
+            if isinstance(backend, SQLiteCacheBackend):
+                json_path = join(dirname(backend.path), f"{name}.json")
+                backend.migrate_json(json_path)
+        self.backend: CacheBackend = backend
+        self.hits = 0
+        self.partial_hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        # (searchtype, phrase) -> (created, size), in access order
+        self._lru = OrderedDict()
+        # (searchtype, phrase) -> number of hits since loaded
+        self._counts = Counter()
+        self._bytes = 0
+        self._track_bytes = 0
+        self._load()
+
+    @property
+    def path(self) -> str:
+        return self.backend.path
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes + self._track_bytes
+
+    @property
+    def stats(self) -> dict:
+        return {"entries": len(self._lru),
+                "bytes": self.size_bytes,
+                "hits": self.hits,
+                "partial_hits": self.partial_hits,
+                "misses": self.misses,
+                "stale_hits": self.stale_hits}
+
+    def __len__(self):
+        return len(self._lru)
+
+    def __contains__(self, key):
+        searchtype, phrase = key
+        with self._lock:
+            entry = self._get(searchtype, phrase)
+            return entry is not None and entry["complete"]
+
+    def _load(self):
+        rows = sorted(self.backend.load_index(), key=lambda r: r[3])
+        for searchtype, phrase, created, _, size in rows:
+            self._lru[(searchtype, phrase)] = (created, size)
+            self._bytes += size
+        self._track_bytes = self.backend.tracks_size()
+        self.sweep()
+
+    def _is_expired(self, created: float, now: float) -> bool:
+        return self.ttl is not None and now - created > self.ttl
+
+    def _is_dead(self, created: float, now: float) -> bool:
+        # expired and not even usable as a stale fallback
+        return self.ttl is not None and \
+            now - created > self.ttl + (self.stale_if_error or 0)
+
+    def _pop(self, searchtype: str, phrase: str):
+        _, size = self._lru.pop((searchtype, phrase), (0, 0))
+        self._counts.pop((searchtype, phrase), None)
+        self._bytes -= size
+        self._track_bytes -= self.backend.delete(searchtype, phrase)
+
+    def get(self, searchtype: str, phrase: str) -> Optional[List[dict]]:
+        """ return cached results, None if missing, expired or partial """
+        entry = self._lookup(searchtype, phrase, partial=False)
+        return entry["results"] if entry is not None else None
+
+    def lookup(self, searchtype: str, phrase: str,
+               stale: bool = False) -> Optional[dict]:
+        """ return the cache entry, including partial results of searches
+        that were abandoned or failed midway (entry["complete"] is False)
+
+        with ``stale`` expired entries within ``stale_if_error`` are returned
+        too, for when fresh results can not be had """
+        return self._lookup(searchtype, phrase, partial=True, stale=stale)
+
+    def _lookup(self, searchtype: str, phrase: str,
+                partial: bool, stale: bool = False) -> Optional[dict]:
+        with self._lock:
+            entry = self._get(searchtype, phrase, stale)
+            if entry is not None and stale and self._is_expired(
+                    self._lru[(searchtype, phrase)][0], time.time()):
+                self.stale_hits += 1
+                return entry
+            if entry is not None and not entry["complete"]:
+                if not partial:
+                    entry = None
+                else:
+                    self.partial_hits += 1
+                    self._counts[(searchtype, phrase)] += 1
+                    return entry
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._counts[(searchtype, phrase)] += 1
+            return entry
+
+    def _get(self, searchtype: str, phrase: str,
+             stale: bool = False) -> Optional[dict]:
+        key = (searchtype, phrase)
+        if key not in self._lru:
+            return None
+        now = time.time()
+        created = self._lru[key][0]
+        if self._is_dead(created, now):
+            self._pop(searchtype, phrase)
+            return None
+        if not stale and self._is_expired(created, now):
+            return None  # kept as a fallback until it is dead
+        entry = self.backend.get(searchtype, phrase)
+        if entry is None:
+            self._pop(searchtype, phrase)
+            return None
+        # access time is persisted on next flush
+        self.backend.touch(searchtype, phrase, now)
+        self._lru.move_to_end(key)
+        entry.setdefault("complete", True)
+        refs = _refs(entry["results"])
+        if refs:
+            # the json backend returns the stored entry itself
+            entry = dict(entry, results=_unpack(entry["results"],
+                                                self.backend.get_tracks(refs)))
+        return entry
+
+    def tracks(self) -> List[dict]:
+        """ every nuvem_de_som track in the cache """
+        with self._lock:
+            return [_track(url, row) for url, row in self.backend.iter_tracks()]
+
+    def age(self, searchtype: str, phrase: str) -> Optional[float]:
+        """ seconds since the entry was fetched, None if not cached,
+        unlike a lookup this does not count as an access """
+        with self._lock:
+            entry = self._lru.get((searchtype, phrase))
+            return time.time() - entry[0] if entry is not None else None
+
+    def expiring(self, within: float,
+                 limit: Optional[int] = None) -> List[Tuple[str, str]]:
+        """ (searchtype, phrase) of entries expiring in less than ``within``
+        seconds, most hit and then most recently used first """
+        if self.ttl is None:
+            return []
+        with self._lock:
+            oldest = time.time() - self.ttl + within
+            keys = [(self._counts[key], idx, key)
+                    for idx, (key, (created, _)) in enumerate(self._lru.items())
+                    if created <= oldest]
+        keys.sort(reverse=True)
+        return [key for _, _, key in keys[:limit]]
+
+    def put(self, searchtype: str, phrase: str, results: List[dict],
+            complete: bool = True):
+        with self._lock:
+            now = time.time()
+            # replaced in place by the backend, only the index needs updating
+            _, size = self._lru.pop((searchtype, phrase), (0, 0))
+            self._bytes -= size
+            results, tracks = _pack(results)
+            if tracks:
+                self._track_bytes += self.backend.put_tracks(tracks)
+            self._track_bytes -= self.backend.put(
+                searchtype, phrase, {"created": now, "accessed": now,
+                                     "complete": complete,
+                                     "results": results})
+            size = len(json.dumps(results))
+            self._lru[(searchtype, phrase)] = (now, size)
+            self._bytes += size
+            self._evict()
+
+    def _evict(self):
+        while self._lru and (
+                (self.max_entries and len(self._lru) > self.max_entries) or
+                (self.max_bytes and self.size_bytes > self.max_bytes)):
+            searchtype, phrase = next(iter(self._lru))
+            LOG.debug(f"evicting soundcloud cache entry: {searchtype}/{phrase}")
+            # tracks only used by the evicted entry are deleted with it
+            self._pop(searchtype, phrase)
+
+    def _prune_tracks(self):
+        if self.backend.prune_tracks():
+            self._track_bytes = self.backend.tracks_size()
+
+    def sweep(self) -> int:
+        """ drop expired entries and enforce size limits,
+        returns number of removed entries """
+        with self._lock:
+            n = len(self._lru)
+            now = time.time()
+            for (searchtype, phrase), (created, _) in list(self._lru.items()):
+                if self._is_dead(created, now):
+                    self._pop(searchtype, phrase)
+            self._evict()
+            self._prune_tracks()
+            return n - len(self._lru)
+
+    def clear(self):
+        with self._lock:
+            self.backend.clear()
+            self._lru.clear()
+            self._counts.clear()
+            self._bytes = 0
+            self._track_bytes = 0
+
+    def store(self):
+        with self._lock:
+            self.backend.flush()
+
+    def close(self):
+        with self._lock:
+            self.backend.close()
@@ -0,0 +1,99 @@
+import time
+from queue import Empty, Full, Queue
+from threading import Event, Thread
+from typing import Callable, Iterable, Optional
+
+from ovos_utils.log import LOG
+
+
+class Deadline:
+    """ latency budget shared by all the work done for a single query """
+
+    def __init__(self, timeout: Optional[float] = None):
+        self.timeout = timeout
+        self.started = time.monotonic()
+        self.expires = self.started + timeout if timeout else None
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    @property
+    def remaining(self) -> Optional[float]:
+        if self.expires is None:
+            return None
+        return max(0.0, self.expires - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.expires is not None and time.monotonic() >= self.expires
+
+
+class DeadlineExceeded(TimeoutError):
+    """ raised by iterate_until when the budget runs out """
+
+
+def iterate_until(func: Callable[..., Iterable], *args,
+                  deadline: Deadline, readahead: int = 0,
+                  **kwargs) -> Iterable:
+    """ iterate ``func(*args, **kwargs)`` in a background thread
+
+    items are yielded as they are produced, DeadlineExceeded is raised once
+    the deadline expires. the producer is cancelled (stops pulling items
+    after the current one) on timeout or when the consumer stops iterating
+
+    the producer waits once ``readahead`` items are not consumed yet (0 for
+    no limit), so a consumer stopping early also stops further pages
+    """
+    if deadline.expires is None:
+        yield from func(*args, **kwargs)
+        return
+
+    name = getattr(func, "__name__", "search")  # not set on partials
+    items = Queue(maxsize=readahead)
+    cancel = Event()
+    done = object()
+    error = []
+
+    def put(item) -> bool:
+        # False once cancelled, nobody is consuming anymore
+        while not cancel.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except Full:
+                pass
+        return False
+
+    def producer():
+        try:
+            for item in func(*args, **kwargs):
+                if cancel.is_set() or not put(item):
+                    break
+        except Exception as e:
+            error.append(e)
+        finally:
+            put(done)
+
+    Thread(target=producer, daemon=True,
+           name=f"soundcloud.{name}").start()
+    try:
+        while True:
+            try:
+                item = items.get(timeout=deadline.remaining)
+            except Empty:
+                LOG.debug(f"{name} cancelled, deadline exceeded")
+                raise DeadlineExceeded(name)
+            if item is done:
+                break
+            yield item
+        if error:
+            raise error[0]
+    finally:
+        cancel.set()
+        # wakes up a producer waiting for room, it stops right away
+        while True:
+            try:
+                items.get_nowait()
+            except Empty:
+                break
@@ -0,0 +1,86 @@
+from collections import Counter
+from threading import Lock
+from typing import Dict, Iterable, List, Set, Tuple
+
+from .normalize import normalize_phrase
+
+
+def trigrams(text: str) -> Set[str]:
+    """ character trigrams of the normalized text, words are padded so
+    short words and word boundaries get trigrams too """
+    text = normalize_phrase(text)
+    if not text:
+        return set()
+    text = f" {text} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TrackIndex:
+    """ in-memory trigram index over the title and artist of known tracks
+
+    nuvem_de_som track dicts are added as they are seen, a search returns
+    the tracks sharing most of the trigrams of the phrase. it only narrows
+    down candidates, they still need to be scored against the phrase
+
+    at most ``max_tracks`` tracks are indexed, further tracks are ignored
+    until the index is cleared
+    """
+
+    def __init__(self, max_tracks: int = 20000):
+        self.max_tracks = max_tracks
+        self._lock = Lock()
+        self._tracks: List[dict] = []
+        self._ids: Dict[str, int] = {}  # url -> position in _tracks
+        self._postings: Dict[str, Set[int]] = {}  # trigram -> track ids
+
+    def __len__(self):
+        return len(self._tracks)
+
+    def __contains__(self, url: str):
+        return url in self._ids
+
+    @property
+    def trigrams(self) -> int:
+        return len(self._postings)
+
+    def add(self, tracks: Iterable[dict]) -> int:
+        """ index new tracks, returns how many were added """
+        n = 0
+        with self._lock:
+            for track in tracks:
+                if track["url"] in self._ids:
+                    continue
+                if len(self._tracks) >= self.max_tracks:
+                    break
+                idx = len(self._tracks)
+                self._ids[track["url"]] = idx
+                self._tracks.append(track)
+                for gram in trigrams(f"{track['artist']} {track['title']}"):
+                    self._postings.setdefault(gram, set()).add(idx)
+                n += 1
+        return n
+
+    def search(self, phrase: str, limit: int = 20,
+               min_overlap: float = 0.5) -> List[Tuple[float, dict]]:
+        """ (overlap, track) of the tracks containing at least
+        ``min_overlap`` of the phrase trigrams, best first """
+        grams = trigrams(phrase)
+        if not grams:
+            return []
+        counts = Counter()
+        with self._lock:
+            for gram in grams:
+                counts.update(self._postings.get(gram, ()))
+            needed = min_overlap * len(grams)
+            matches = []
+            for idx, n in counts.most_common():
+                if n < needed or len(matches) >= limit:
+                    break
+                matches.append((n / len(grams), self._tracks[idx]))
+        return matches
+
+    def clear(self):
+        with self._lock:
+            self._tracks.clear()
+            self._ids.clear()
+            self._postings.clear()
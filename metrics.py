@@ -0,0 +1,135 @@
+import time
+from threading import Lock
+from typing import Dict, Iterable, List
+
+# histogram bucket upper bounds, in milliseconds
+BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, 5000,
+           float("inf"))
+
+
+class Histogram:
+    """ fixed bucket latency histogram, in milliseconds """
+
+    def __init__(self, buckets=BUCKETS):
+        self.bounds = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, ms: float):
+        for i, bound in enumerate(self.bounds):
+            if ms <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.total += ms
+        self.min = ms if self.min is None else min(self.min, ms)
+        self.max = ms if self.max is None else max(self.max, ms)
+
+    def percentile(self, q: float) -> float:
+        """ upper bound of the bucket holding the q-th percentile """
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, n in zip(self.bounds, self.counts):
+            seen += n
+            if seen >= target:
+                return min(bound, self.max)
+        return self.max
+
+    def as_dict(self) -> dict:
+        return {"count": self.count,
+                "total_ms": self.total,
+                "mean_ms": self.total / self.count if self.count else 0.0,
+                "min_ms": self.min or 0.0,
+                "max_ms": self.max or 0.0,
+                "p50_ms": self.percentile(0.5),
+                "p95_ms": self.percentile(0.95),
+                "buckets": {str(b): n for b, n in zip(self.bounds, self.counts)
+                            if n}}
+
+
+class _Timer:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self.metrics.observe(self.name, time.perf_counter() - self.start)
+
+
+class SearchMetrics:
+    """ counters and timing histograms for the search hot path
+
+    names are free form, by convention "<stage>" or "<stage>.<searchtype>",
+    eg. "upstream.artists", "score", "entry", "store", "previews_filtered"
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self.counters: Dict[str, int] = {}
+        self.histograms: Dict[str, Histogram] = {}
+
+    def incr(self, name: str, n: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe(self, name: str, seconds: float):
+        with self._lock:
+            if name not in self.histograms:
+                self.histograms[name] = Histogram()
+            self.histograms[name].observe(seconds * 1000)
+
+    def timer(self, name: str) -> _Timer:
+        """ context manager observing the time spent in its block """
+        return _Timer(self, name)
+
+    def timed(self, name: str, iterable: Iterable) -> Iterable:
+        """ yields from ``iterable``, the time spent waiting on it is observed
+        once it is exhausted or closed """
+        it = iter(iterable)
+        elapsed = 0.0
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(it)
+                except StopIteration:
+                    return
+                finally:
+                    elapsed += time.perf_counter() - start
+                yield item
+        finally:
+            if hasattr(it, "close"):
+                it.close()  # eg. cancel the upstream search
+            self.observe(name, elapsed)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"counters": dict(self.counters),
+                    "histograms": {k: h.as_dict()
+                                   for k, h in self.histograms.items()}}
+
+    def summary(self) -> str:
+        """ single line for the logs """
+        with self._lock:
+            parts: List[str] = [f"{k}={v}" for k, v in
+                                sorted(self.counters.items())]
+            parts += [f"{k}: n={h.count} p50={h.percentile(0.5):g}ms "
+                      f"p95={h.percentile(0.95):g}ms max={h.max or 0:.1f}ms"
+                      for k, h in sorted(self.histograms.items())]
+        return ", ".join(parts)
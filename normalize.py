@@ -0,0 +1,40 @@
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Iterable, Tuple
+
+_SPACES = re.compile(r"\s+")
+
+
+def _clean(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text).casefold()
+    # punctuation and symbols only, combining marks (M*) are part of words
+    text = "".join(" " if unicodedata.category(c)[0] in "PS" else c
+                   for c in text)
+    return _SPACES.sub(" ", text).strip()
+
+
+@lru_cache(maxsize=32)
+def _stopwords_regex(stopwords: Tuple[str, ...]):
+    words = sorted({_clean(w) for w in stopwords} - {""},
+                   key=len, reverse=True)
+    if not words:
+        return None
+    # longest first, so "on sound cloud" is removed before "sound cloud"
+    return re.compile(r"(?<!\S)(?:" + "|".join(map(re.escape, words)) +
+                      r")(?!\S)")
+
+
+def normalize_phrase(phrase: str, stopwords: Iterable[str] = ()) -> str:
+    """ canonical form of a search phrase, used as cache key
+
+    unicode is NFKC normalized and case folded, punctuation and repeated
+    whitespace are collapsed and ``stopwords`` (eg, soundcloud.voc) removed
+    """
+    phrase = _clean(phrase)
+    regex = _stopwords_regex(tuple(stopwords))
+    if regex is not None:
+        stripped = _SPACES.sub(" ", regex.sub(" ", phrase)).strip()
+        # "soundcloud" on its own is still a valid query
+        phrase = stripped or phrase
+    return phrase
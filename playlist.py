@@ -0,0 +1,98 @@
+from threading import Lock
+from typing import Callable, Iterable, List
+
+from ovos_utils.ocp import Playlist, PluginStream
+
+
+def entry2track(entry: PluginStream) -> dict:
+    """ nuvem_de_som track dict of an entry built by the skill """
+    return {"title": entry.title, "artist": entry.artist,
+            "url": getattr(entry, "stream", None) or entry.uri,
+            "duration": entry.length // 1000,  # milliseconds to seconds
+            "image": entry.image}
+
+
+class LazyPlaylist(Playlist):
+    """ Playlist that only builds its entries when they are needed
+
+    ``tracks`` are nuvem_de_som track dicts, they are turned into entries by
+    ``factory(track, idx)`` the first time the playlist contents are accessed
+    (iterated, indexed, serialized...), its length and ``streams`` are known
+    without doing so
+
+    the playlist (eg, its match_confidence) is scored by the caller from the
+    entries it builds right away
+    """
+
+    def __init__(self, *args, tracks: Iterable[dict] = (),
+                 factory: Callable[[dict, int], PluginStream] = None,
+                 **kwargs):
+        self._pending: List[dict] = list(tracks)
+        self._factory = factory
+        self._lock = Lock()
+        super().__init__(*args, **kwargs)
+
+    @property
+    def pending(self) -> int:
+        """ number of entries not built yet """
+        return len(self._pending)
+
+    @property
+    def streams(self) -> List[str]:
+        with self._lock:
+            return [getattr(e, "stream", None) or e.uri
+                    for e in list.__iter__(self)] + \
+                   [t["url"] for t in self._pending]
+
+    @property
+    def as_lazy_dict(self) -> dict:
+        """ lightweight form of the playlist, entries are not built """
+        with self._lock:
+            tracks = [entry2track(e) for e in list.__iter__(self)] + \
+                     self._pending
+        return {"title": self.title,
+                "image": self.image,
+                "match_confidence": self.match_confidence,
+                "tracks": tracks}
+
+    def defer(self, tracks: Iterable[dict]):
+        """ append tracks without building their entries """
+        with self._lock:
+            self._pending.extend(tracks)
+
+    def materialize(self) -> 'LazyPlaylist':
+        with self._lock:
+            if self._pending:
+                pending, self._pending = self._pending, []
+                start = list.__len__(self)
+                for idx, track in enumerate(pending, start):
+                    list.append(self, self._factory(track, idx))
+        return self
+
+    def __len__(self):
+        return list.__len__(self) + len(self._pending)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pending = []
+        super().clear()
+
+
+def _materialized(name):
+    method = getattr(Playlist, name)
+
+    def wrapper(self, *args, **kwargs):
+        self.materialize()
+        return method(self, *args, **kwargs)
+
+    wrapper.__name__ = name
+    wrapper.__doc__ = method.__doc__
+    return wrapper
+
+
+# everything that reads or changes the contents needs every entry
+for _name in ("__iter__", "__reversed__", "__getitem__", "__setitem__",
+              "__delitem__", "__contains__", "__iadd__", "append", "extend",
+              "insert", "pop", "remove", "index", "count", "sort", "reverse",
+              "copy"):
+    setattr(LazyPlaylist, _name, _materialized(_name))
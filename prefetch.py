@@ -0,0 +1,82 @@
+import random
+import time
+from threading import Event, Thread
+from typing import Callable, List, Optional, Tuple
+
+from ovos_utils.log import LOG
+
+Query = Tuple[str, str]  # (searchtype, phrase)
+
+
+class Prefetcher:
+    """ refresh cached searches in a background thread
+
+    every ``interval`` seconds (+- ``jitter``) up to ``max_queries`` queries
+    returned by ``candidates()`` are passed to ``refresh(searchtype, phrase)``,
+    waiting ``delay`` seconds (+- ``jitter``) between them so soundcloud is
+    not hammered.
+
+    work only happens while idle, nothing runs until ``idle`` seconds after
+    the last ``notify_search()`` and a busy cycle is cut short
+    """
+
+    def __init__(self, candidates: Callable[[], List[Query]],
+                 refresh: Callable[[str, str], None],
+                 interval: float = 600, delay: float = 10,
+                 jitter: float = 0.5, idle: float = 30,
+                 max_queries: int = 5):
+        self.candidates = candidates
+        self.refresh = refresh
+        self.interval = interval
+        self.delay = delay
+        self.jitter = jitter
+        self.idle = idle
+        self.max_queries = max_queries
+        self._last_search = 0.0
+        self._stopped = Event()
+        self._thread: Optional[Thread] = None
+
+    @property
+    def is_idle(self) -> bool:
+        return time.monotonic() - self._last_search >= self.idle
+
+    def notify_search(self):
+        """ a user search is running, back off """
+        self._last_search = time.monotonic()
+
+    def _jittered(self, seconds: float) -> float:
+        return seconds * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def start(self):
+        self._stopped.clear()
+        self._thread = Thread(target=self._run, daemon=True,
+                              name="soundcloud.prefetch")
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _run(self):
+        while not self._stopped.wait(self._jittered(self.interval)):
+            try:
+                self.run_once()
+            except Exception as e:
+                LOG.error(f"soundcloud prefetch failed: {e}")
+
+    def run_once(self) -> int:
+        """ refresh the current candidates, returns how many were refreshed """
+        if not self.is_idle:
+            return 0
+        n = 0
+        for searchtype, phrase in self.candidates()[:self.max_queries]:
+            if n and self._stopped.wait(self._jittered(self.delay)):
+                break
+            if self._stopped.is_set() or not self.is_idle:
+                break
+            try:
+                self.refresh(searchtype, phrase)
+                n += 1
+            except Exception as e:
+                LOG.error(f"soundcloud prefetch of {searchtype} '{phrase}' "
+                          f"failed: {e}")
+        return n
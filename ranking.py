@@ -0,0 +1,44 @@
+from typing import Iterable, Iterator, List, Set
+
+from .normalize import normalize_phrase
+
+
+def artist_key(artist: str) -> str:
+    """ "Piratech", "piratech" and "pira-tech" are the same artist """
+    return normalize_phrase(artist).replace(" ", "")
+
+
+def merge_artists(people: Iterable[dict]) -> Iterator[dict]:
+    """ merge consecutive nuvem_de_som artists with the same ``artist_key``
+
+    soundcloud returns near-duplicate accounts next to each other, the first
+    one (the best ranked) is kept with the tracks of the others it does not
+    have appended, so every track is only scored once
+    """
+    merged = None
+    try:
+        for person in people:
+            if merged is not None and \
+                    artist_key(person["artist"]) == artist_key(merged["artist"]):
+                urls = {t["url"] for t in merged["tracks"]}
+                merged["tracks"] += [t for t in person["tracks"]
+                                     if t["url"] not in urls]
+                continue
+            if merged is not None:
+                yield merged
+            # upstream dicts may be shared, copied before merging into them
+            merged = dict(person, tracks=list(person["tracks"]))
+    except Exception:
+        # eg. timed out waiting for the next one, it is not lost
+        if merged is not None:
+            yield merged
+        raise
+    if merged is not None:
+        yield merged
+
+
+def unseen_tracks(tracks: List[dict], seen: Set[str]) -> List[dict]:
+    """ tracks whose url is not in ``seen``, which is updated with them """
+    new = [t for t in tracks if t["url"] not in seen]
+    seen.update(t["url"] for t in new)
+    return new
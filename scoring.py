@@ -0,0 +1,134 @@
+from typing import Dict, Iterable, List, Optional
+
+from ovos_utils.parse import fuzzy_match, MatchStrategy
+
+
+class DurationRules:
+    """ duration rules for nuvem_de_som tracks, in seconds
+
+    they only need the track dict, so they run before any scoring:
+    tracks up to ``min_duration`` long are previews and never results,
+    single track results over ``max_duration`` (0 for no limit) are
+    probably podcasts or mixes rather than songs, and tracks longer
+    than ``penalty_after`` lose ``penalty`` points per extra minute
+    """
+
+    def __init__(self, min_duration: float = 60,
+                 max_duration: float = 45 * 60,
+                 penalty_after: float = 10 * 60, penalty: float = 1):
+        self.min_duration = min_duration
+        self.max_duration = max_duration
+        self.penalty_after = penalty_after
+        self.penalty = penalty
+
+    def reject(self, track: dict, songs: bool = False) -> Optional[str]:
+        """ why the track is not a result, "previews" or "long_tracks",
+        ``songs`` applies ``max_duration`` too """
+        if track["duration"] <= self.min_duration:
+            return "previews"
+        if songs and self.max_duration and \
+                track["duration"] > self.max_duration:
+            return "long_tracks"
+        return None
+
+    def length_penalty(self, track: dict) -> float:
+        extra = track.get("duration", 0) - self.penalty_after
+        if not self.penalty or extra <= 0:
+            return 0
+        return self.penalty * extra / 60
+
+
+class QueryScorer:
+    """ scores soundcloud results against a single search phrase
+
+    the phrase is normalized once and artist and title scores are cached,
+    the same artist repeats for every track of a "Featured Tracks" playlist
+    and the same track shows up in several playlists.
+
+    scores are identical to the original ``SoundCloudSkill.calc_score``,
+    unless ``min_score`` is given: candidates that can not reach it are
+    skipped without the full edit distance and scored as ``None``, or
+    ``durations`` is given: long tracks get its length penalty
+    """
+
+    def __init__(self, phrase: str, searchtype: str = "tracks",
+                 base_score: float = 0,
+                 durations: Optional[DurationRules] = None):
+        self.phrase = phrase.lower().strip()
+        self.searchtype = searchtype
+        self.base_score = base_score
+        self.durations = durations
+        self._artists: Dict[str, float] = {}
+        self._titles: Dict[str, float] = {}
+
+    def _similarity(self, text: str) -> float:
+        return 100 * fuzzy_match(
+            self.phrase, text.lower().strip(),
+            strategy=MatchStrategy.DAMERAU_LEVENSHTEIN_SIMILARITY)
+
+    def _upper_bound(self, text: str) -> float:
+        # the edit distance is at least the difference in length
+        a, b = len(self.phrase), len(text.lower().strip())
+        longest = max(a, b)
+        if not longest:
+            return 100
+        return 100 * (1 - abs(a - b) / longest)
+
+    def artist_score(self, artist: str) -> float:
+        if artist not in self._artists:
+            self._artists[artist] = self._similarity(artist)
+        return self._artists[artist]
+
+    def title_score(self, title: str) -> float:
+        if title not in self._titles:
+            self._titles[title] = self._similarity(title)
+        return self._titles[title]
+
+    def _weights(self, artist_score: float):
+        """ (artist, title) weights, they always add up to 1 """
+        if self.searchtype == "artists":
+            return 1, 0
+        if self.searchtype == "tracks":
+            if artist_score >= 75:
+                return 0.5, 0.5
+            return 0.15, 0.85
+        if artist_score >= 85:
+            return 0.85, 0.15
+        if artist_score >= 70:
+            return 0.7, 0.3
+        if artist_score >= 50:
+            return 0.5, 0.5
+        return 0.3, 0.7
+
+    def score(self, match: dict, idx: int = 0,
+              min_score: Optional[float] = None) -> Optional[float]:
+        # idx represents the order from soundcloud
+        score = self.base_score
+        artist_score = self.artist_score(match["artist"])
+        artist_weight, title_weight = self._weights(artist_score)
+        decay = idx * 2 if self.searchtype == "tracks" else 0
+        if self.durations is not None:
+            decay += self.durations.length_penalty(match)
+        if title_weight:
+            if min_score is not None:
+                # cheap check before the full edit distance
+                best = score + artist_score * artist_weight + \
+                       self._upper_bound(match["title"]) * title_weight - decay
+                if best < min_score:
+                    return None
+            title_score = self.title_score(match["title"])
+            score += artist_score * artist_weight + title_score * title_weight
+        else:
+            score += artist_score
+        # - 2% as we go down the results list, and the length penalty
+        score -= decay
+        score = min((100, score))
+        if min_score is not None and score < min_score:
+            return None
+        return score
+
+    def score_many(self, matches: Iterable[dict], start: int = 0,
+                   min_score: Optional[float] = None) -> List[Optional[float]]:
+        """ score a batch of results, ``start`` is the idx of the first one """
+        return [self.score(m, idx, min_score)
+                for idx, m in enumerate(matches, start)]
@@ -0,0 +1,130 @@
+from threading import Condition, Lock, Thread
+from typing import Callable, Dict, Hashable, Iterable
+
+from ovos_utils.log import LOG
+
+
+class _Flight:
+    def __init__(self):
+        self.items = []
+        self.done = False
+        self.subscribers = 0
+        self.wanted = 0  # number of items requested by the fastest subscriber
+        self.pulling = False  # producer is waiting on the upstream search
+        self.gen = None
+        self.cond = Condition()
+
+
+class SingleFlight:
+    """ coalesce concurrent identical searches
+
+    the first caller for a key starts ``func`` in a background thread, every
+    caller for the same key while it is running subscribes to it and receives
+    all the items it produced so far and any new ones as they arrive.
+
+    items are only pulled from ``func`` when a subscriber asks for them, once
+    every subscriber stopped iterating the search is closed right away.
+
+    NOTE: only the leader's arguments are used, callers joining a flight get
+    the results of the leader's call as-is (eg, scored against its phrase)
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+
+    def __len__(self):
+        return len(self._flights)
+
+    def run(self, key: Hashable, func: Callable[..., Iterable],
+            *args, **kwargs) -> Iterable:
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                LOG.debug(f"joining in-flight soundcloud search: {key}")
+            with flight.cond:
+                flight.subscribers += 1
+        if leader:
+            Thread(target=self._produce, args=(key, flight, func, args, kwargs),
+                   daemon=True, name="soundcloud.flight").start()
+        return self._subscribe(key, flight)
+
+    def _produce(self, key, flight: _Flight, func, args, kwargs):
+        try:
+            gen = iter(func(*args, **kwargs))
+            with flight.cond:
+                flight.gen = gen
+            while True:
+                with flight.cond:
+                    while not flight.done and flight.subscribers and \
+                            flight.wanted <= len(flight.items):
+                        flight.cond.wait()
+                    if flight.done or not flight.subscribers:
+                        break
+                    flight.pulling = True
+                try:
+                    item = next(gen)
+                except StopIteration:
+                    break
+                finally:
+                    with flight.cond:
+                        flight.pulling = False
+                with flight.cond:
+                    flight.items.append(item)
+                    flight.cond.notify_all()
+        except Exception as e:
+            LOG.error(f"soundcloud search {key} failed: {e}")
+        finally:
+            self._finish(key, flight)
+
+    def _finish(self, key, flight: _Flight):
+        with self._lock:
+            if self._flights.get(key) is flight:
+                self._flights.pop(key)
+            with flight.cond:
+                flight.done = True
+                gen, flight.gen = flight.gen, None
+                flight.cond.notify_all()
+        self._close(key, gen)
+
+    @staticmethod
+    def _close(key, gen):
+        try:
+            if hasattr(gen, "close"):
+                gen.close()
+        except Exception as e:
+            LOG.error(f"soundcloud search {key} failed to close: {e}")
+
+    def _subscribe(self, key, flight: _Flight) -> Iterable:
+        idx = 0
+        try:
+            while True:
+                with flight.cond:
+                    flight.wanted = max(flight.wanted, idx + 1)
+                    flight.cond.notify_all()
+                    while idx >= len(flight.items) and not flight.done:
+                        flight.cond.wait()
+                    if idx >= len(flight.items):
+                        return
+                    item = flight.items[idx]
+                idx += 1
+                yield item
+        finally:
+            gen = None
+            with self._lock:
+                with flight.cond:
+                    flight.subscribers -= 1
+                    # nobody is listening, stop the upstream search now unless
+                    # the producer is busy fetching, it notices once it is back
+                    if not flight.subscribers and not flight.pulling \
+                            and not flight.done:
+                        flight.done = True
+                        gen, flight.gen = flight.gen, None
+                        if self._flights.get(key) is flight:
+                            self._flights.pop(key)  # too late to join it
+                    flight.cond.notify_all()
+            # closed synchronously, partial results are cached when we return
+            self._close(key, gen)
@@ -0,0 +1,114 @@
+import base64
+import json
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor
+from threading import Lock
+from typing import Callable, Iterable, Optional
+from urllib.parse import parse_qs, urlparse
+
+from ovos_utils.log import LOG
+
+
+def _policy_expires(policy: str) -> Optional[float]:
+    # CloudFront signed urls, base64 json with "-_~" instead of "+=/"
+    policy = policy.replace("-", "+").replace("_", "=").replace("~", "/")
+    statement = json.loads(base64.b64decode(policy))["Statement"][0]
+    return float(statement["Condition"]["DateLessThan"]["AWS:EpochTime"])
+
+
+def expires_at(uri: str, default_ttl: float) -> float:
+    """ epoch time the resolved ``uri`` stops working, read from its signed
+    query when possible, else ``default_ttl`` seconds from now """
+    query = parse_qs(urlparse(uri).query)
+    for key in ("Expires", "expires", "exp"):
+        if key in query:
+            try:
+                return float(query[key][0])
+            except ValueError:
+                pass
+    if "Policy" in query:
+        try:
+            return _policy_expires(query["Policy"][0])
+        except Exception as e:
+            LOG.debug(f"can not read the expiration of {uri}: {e}")
+    return time.time() + default_ttl
+
+
+class StreamCache:
+    """ resolved stream uris by track url, only handed out until ``margin``
+    seconds before they expire, the least recently resolved are dropped
+    once there are more than ``max_entries`` """
+
+    def __init__(self, margin: float = 60, max_entries: int = 100):
+        self.margin = margin
+        self.max_entries = max_entries
+        self._lock = Lock()
+        self._uris = OrderedDict()  # url -> (uri, expires)
+
+    def __len__(self):
+        return len(self._uris)
+
+    def __contains__(self, url: str):
+        return self.get(url) is not None
+
+    def put(self, url: str, uri: str, expires: float):
+        with self._lock:
+            self._uris.pop(url, None)
+            self._uris[url] = (uri, expires)
+            while len(self._uris) > self.max_entries:
+                self._uris.popitem(last=False)
+
+    def get(self, url: str) -> Optional[str]:
+        with self._lock:
+            if url not in self._uris:
+                return None
+            uri, expires = self._uris[url]
+            if time.time() >= expires - self.margin:
+                self._uris.pop(url)
+                return None
+            return uri
+
+    def clear(self):
+        with self._lock:
+            self._uris.clear()
+
+
+class StreamResolver:
+    """ resolve track urls to stream uris in the background, ahead of
+    playback, with ``resolve(url) -> uri`` (eg. the ydl extractor) """
+
+    def __init__(self, resolve: Callable[[str], str], executor: Executor,
+                 cache: StreamCache, default_ttl: float = 300):
+        self.resolve = resolve
+        self.executor = executor
+        self.cache = cache
+        self.default_ttl = default_ttl
+        self._lock = Lock()
+        self._pending = set()
+
+    def submit(self, urls: Iterable[str]) -> int:
+        """ resolve the urls that are not resolved or being resolved yet,
+        returns how many were submitted """
+        n = 0
+        for url in urls:
+            if url in self.cache:
+                continue
+            with self._lock:
+                if url in self._pending:
+                    continue
+                self._pending.add(url)
+            self.executor.submit(self._resolve, url)
+            n += 1
+        return n
+
+    def _resolve(self, url: str):
+        try:
+            uri = self.resolve(url)
+            if uri:
+                self.cache.put(url, uri, expires_at(uri, self.default_ttl))
+        except Exception as e:
+            LOG.debug(f"failed to resolve soundcloud stream {url}: {e}")
+        finally:
+            with self._lock:
+                self._pending.discard(url)
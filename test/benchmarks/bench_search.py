@@ -0,0 +1,271 @@
+""" offline benchmarks for the soundcloud search and scoring hot paths
+
+upstream responses are replayed from recordings.json, no network is needed
+
+    python test/benchmarks/bench_search.py            # compare to baseline
+    python test/benchmarks/bench_search.py --save     # update the baseline
+    python test/benchmarks/bench_search.py --check    # exit 1 on regressions
+    python test/benchmarks/bench_search.py --record piratech lofi
+
+timings depend on the machine, save a baseline on the machine you compare on
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from os.path import dirname, join
+from shutil import rmtree
+from tempfile import mkdtemp
+from unittest.mock import patch
+
+from replay import ReplaySoundCloud, record
+
+BASELINE = join(dirname(__file__), "baseline.json")
+SEARCH_TYPES = ("artists", "sets", "tracks", "generic")
+# metrics where a bigger value is an improvement
+HIGHER_IS_BETTER = ("_per_sec",)
+# modules only imported once the skill searches
+LAZY_MODULES = ("nuvem_de_som", "bs4", "skill_ovos_soundcloud.cache")
+# run in a fresh interpreter, imports are only measurable once
+STARTUP_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import skill_ovos_soundcloud
+imported = time.perf_counter()
+lazy = [m for m in sys.argv[1:] if m in sys.modules]
+from ovos_utils.fakebus import FakeBus
+bus = FakeBus()
+start_construct = time.perf_counter()
+skill = skill_ovos_soundcloud.SoundCloudSkill(
+    bus=bus, skill_id="skill-ovos-soundcloud.startup")
+constructed = time.perf_counter()
+skill._warmup_thread.join()
+loaded = time.perf_counter()
+skill.shutdown()
+print("startup:", json.dumps({"import_ms": 1000 * (imported - start),
+                  "construct_ms": 1000 * (constructed - start_construct),
+                  "warmup_ms": 1000 * (loaded - constructed),
+                  "imported": lazy}), flush=True)
+"""
+
+
+def measure_startup() -> dict:
+    """ import and construction cost of the skill, in a new interpreter,
+    "imported" lists the ``LAZY_MODULES`` loaded by the import """
+    import skill_ovos_soundcloud
+    path = dirname(dirname(skill_ovos_soundcloud.__file__))
+    out = subprocess.run([sys.executable, "-c", STARTUP_PROBE, *LAZY_MODULES],
+                         cwd=path, check=True, stdout=subprocess.PIPE)
+    # the skill logs to stdout too
+    for line in out.stdout.decode().splitlines():
+        if line.startswith("startup: "):
+            return json.loads(line[len("startup: "):])
+    raise RuntimeError("the startup probe did not report")
+
+
+def n_entries(results) -> int:
+    return sum(len(r) if hasattr(r, "entries") else 1 for r in results)
+
+
+def timed(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+class SearchBenchmark:
+    def __init__(self, iterations=20, latency=0):
+        import skill_ovos_soundcloud
+        from ovos_utils.fakebus import FakeBus
+        from skill_ovos_soundcloud.cache import SearchCache
+
+        ReplaySoundCloud.load(latency=latency)
+        self.iterations = iterations
+        self.queries = ReplaySoundCloud.queries()
+        self.folder = mkdtemp()
+        self.patcher = patch.object(skill_ovos_soundcloud, "SoundCloud",
+                                    ReplaySoundCloud)
+        self.patcher.start()
+        self.skill = skill_ovos_soundcloud.SoundCloudSkill(
+            bus=FakeBus(), skill_id="skill-ovos-soundcloud.benchmark")
+        self.skill._warmup_thread.join()
+        self.skill._search_cache = SearchCache(xdg_folder=self.folder)
+
+    def close(self):
+        self.skill.shutdown()
+        self.patcher.stop()
+        rmtree(self.folder, ignore_errors=True)
+
+    def search(self, phrase, searchtype):
+        # search_ocp resolves the language once for all the searches
+        return list(self.skill.search_soundcloud(phrase, searchtype,
+                                                 lang="en-us"))
+
+    def bench_scoring(self) -> dict:
+        from skill_ovos_soundcloud import SoundCloudSkill
+        from skill_ovos_soundcloud.scoring import QueryScorer
+
+        recordings = ReplaySoundCloud.recordings
+        tracks = {q: [t for p in recordings["people"][q] for t in p["tracks"]] +
+                  recordings["tracks"][q] for q in self.queries}
+        total = sum(len(t) for t in tracks.values())
+
+        def scorer():
+            for q, t in tracks.items():
+                QueryScorer(q, "sets").score_many(t)
+
+        def calc_score():
+            for q, t in tracks.items():
+                for idx, m in enumerate(t):
+                    SoundCloudSkill.calc_score(q, m, idx=idx, searchtype="sets")
+
+        return {
+            "scoring_us_per_track": 1e6 * min(
+                timed(scorer) for _ in range(self.iterations)) / total,
+            "calc_score_us_per_track": 1e6 * min(
+                timed(calc_score) for _ in range(self.iterations)) / total
+        }
+
+    def bench_search(self) -> dict:
+        metrics = {}
+        for searchtype in SEARCH_TYPES:
+            latencies = []
+            entries = 0
+            for _ in range(self.iterations):
+                for q in self.queries:
+                    self.skill._search_cache.clear()
+                    start = time.perf_counter()
+                    results = self.search(q, searchtype)
+                    latencies.append(time.perf_counter() - start)
+                    entries += n_entries(results)
+            metrics[f"search_{searchtype}_ms"] = \
+                1000 * statistics.median(latencies)
+            metrics[f"search_{searchtype}_entries_per_sec"] = \
+                entries / sum(latencies)
+        return metrics
+
+    def bench_cache(self) -> dict:
+        self.skill._search_cache.clear()
+        for q in self.queries:
+            self.search(q, "artists")
+        hits = [timed(self.search, q, "artists")
+                for _ in range(self.iterations) for q in self.queries]
+        return {"cache_hit_ms": 1000 * statistics.median(hits),
+                "cache_bytes": self.skill._search_cache.size_bytes}
+
+    def bench_memory(self) -> dict:
+        self.skill._search_cache.clear()
+        tracemalloc.start()
+        try:
+            for searchtype in SEARCH_TYPES:
+                for q in self.queries:
+                    self.search(q, searchtype)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return {"memory_peak_kib": peak / 1024}
+
+    def bench_low_resource(self) -> dict:
+        from skill_ovos_soundcloud.cache import SearchCache
+
+        skill = self.skill
+        cache = skill._search_cache
+        skill.settings["low_resource"] = True
+        skill._search_cache = SearchCache(
+            xdg_folder=self.folder, name="low_resource",
+            max_entries=skill._limit("cache_max_entries"),
+            max_bytes=skill._limit("cache_max_bytes"))
+        try:
+            peak = self.bench_memory()["memory_peak_kib"]
+            return {"low_resource_memory_peak_kib": peak,
+                    "low_resource_cache_bytes": skill._search_cache.size_bytes}
+        finally:
+            skill._search_cache.close()
+            skill._search_cache = cache
+            skill.settings["low_resource"] = False
+
+    def bench_startup(self) -> dict:
+        startup = measure_startup()
+        return {"startup_import_ms": startup["import_ms"],
+                "startup_construct_ms": startup["construct_ms"]}
+
+    def run(self) -> dict:
+        metrics = {}
+        for bench in (self.bench_scoring, self.bench_search,
+                      self.bench_cache, self.bench_memory,
+                      self.bench_low_resource, self.bench_startup):
+            metrics.update(bench())
+        return metrics
+
+
+def regressions(metrics: dict, baseline: dict, tolerance: float) -> list:
+    found = []
+    for name, value in metrics.items():
+        old = baseline.get(name)
+        if not old:
+            continue
+        if name.endswith(HIGHER_IS_BETTER):
+            if value < old / (1 + tolerance):
+                found.append(name)
+        elif value > old * (1 + tolerance):
+            found.append(name)
+    return found
+
+
+def report(metrics: dict, baseline: dict, regressed: list):
+    print(f"{'metric':<36}{'value':>14}{'baseline':>14}{'change':>10}")
+    for name, value in metrics.items():
+        old = baseline.get(name)
+        change = f"{100 * (value - old) / old:+.1f}%" if old else ""
+        flag = "  REGRESSION" if name in regressed else ""
+        old = f"{old:.2f}" if old is not None else "-"
+        print(f"{name:<36}{value:>14.2f}{old:>14}{change:>10}{flag}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0,
+                        help="seconds of simulated upstream latency per result")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="allowed relative change before a regression")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save", action="store_true",
+                        help="save the results as the new baseline")
+    parser.add_argument("--check", action="store_true",
+                        help="exit with an error if anything regressed")
+    parser.add_argument("--record", nargs="+", metavar="QUERY",
+                        help="record live responses instead of benchmarking")
+    args = parser.parse_args(argv)
+
+    if args.record:
+        record(args.record)
+        return 0
+
+    bench = SearchBenchmark(args.iterations, args.latency)
+    try:
+        metrics = bench.run()
+    finally:
+        bench.close()
+
+    try:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        baseline = {}
+    regressed = regressions(metrics, baseline, args.tolerance)
+    report(metrics, baseline, regressed)
+
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump(metrics, f, indent=2, sort_keys=True)
+    if args.check and regressed:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
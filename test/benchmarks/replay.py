@@ -0,0 +1,71 @@
+import copy
+import json
+import time
+from os.path import dirname, join
+
+RECORDINGS = join(dirname(__file__), "recordings.json")
+# nuvem_de_som method -> recordings section
+METHODS = {"search_people": "people", "search_sets": "sets",
+           "search_tracks": "tracks", "search": "search"}
+
+
+def load_recordings(path: str = RECORDINGS) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def record(queries, path: str = RECORDINGS):
+    """ save live nuvem_de_som responses for ``queries`` (needs network) """
+    from nuvem_de_som import SoundCloud
+    recordings = {section: {} for section in METHODS.values()}
+    for method, section in METHODS.items():
+        for query in queries:
+            recordings[section][query] = list(getattr(SoundCloud, method)(query))
+    with open(path, "w") as f:
+        json.dump(recordings, f, indent=1, ensure_ascii=False)
+    return recordings
+
+
+class ReplaySoundCloud:
+    """ drop-in for nuvem_de_som.SoundCloud replaying recorded responses
+
+    ``latency`` seconds are slept before every result to model the upstream
+    scrape, unknown queries return nothing
+    """
+    recordings = {}
+    latency = 0
+    calls = 0
+
+    @classmethod
+    def load(cls, path: str = RECORDINGS, latency: float = 0):
+        cls.recordings = load_recordings(path)
+        cls.latency = latency
+        cls.calls = 0
+
+    @classmethod
+    def queries(cls):
+        return sorted(cls.recordings.get("people", {}))
+
+    @classmethod
+    def _replay(cls, section, query):
+        cls.calls += 1
+        for r in cls.recordings.get(section, {}).get(query.lower().strip(), []):
+            if cls.latency:
+                time.sleep(cls.latency)
+            yield copy.deepcopy(r)
+
+    @classmethod
+    def search_people(cls, query):
+        return cls._replay("people", query)
+
+    @classmethod
+    def search_sets(cls, query):
+        return cls._replay("sets", query)
+
+    @classmethod
+    def search_tracks(cls, query):
+        return cls._replay("tracks", query)
+
+    @classmethod
+    def search(cls, query):
+        return cls._replay("search", query)
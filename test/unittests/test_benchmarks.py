@@ -0,0 +1,48 @@
+import json
+import sys
+import unittest
+from os.path import dirname, join
+from shutil import rmtree
+from tempfile import mkdtemp
+
+sys.path.insert(0, join(dirname(dirname(__file__)), "benchmarks"))
+
+import bench_search  # noqa: E402
+from replay import ReplaySoundCloud  # noqa: E402
+
+
+class TestBenchmarks(unittest.TestCase):
+    def setUp(self):
+        self.folder = mkdtemp()
+
+    def tearDown(self):
+        rmtree(self.folder, ignore_errors=True)
+
+    def test_replay(self):
+        ReplaySoundCloud.load()
+        self.assertIn("piratech", ReplaySoundCloud.queries())
+        people = list(ReplaySoundCloud.search_people("Piratech"))
+        self.assertTrue(people)
+        self.assertTrue(all("tracks" in p for p in people))
+        self.assertEqual(list(ReplaySoundCloud.search_tracks("unknown")), [])
+
+    def test_regressions(self):
+        baseline = {"search_artists_ms": 10,
+                    "search_artists_entries_per_sec": 1000}
+        self.assertEqual(bench_search.regressions(
+            {"search_artists_ms": 12, "search_artists_entries_per_sec": 900},
+            baseline, 0.5), [])
+        self.assertEqual(bench_search.regressions(
+            {"search_artists_ms": 20, "search_artists_entries_per_sec": 500},
+            baseline, 0.5),
+            ["search_artists_ms", "search_artists_entries_per_sec"])
+
+    def test_run(self):
+        baseline = join(self.folder, "baseline.json")
+        self.assertEqual(bench_search.main(["--iterations", "1", "--save",
+                                            "--baseline", baseline]), 0)
+        with open(baseline) as f:
+            metrics = json.load(f)
+        for name in ("scoring_us_per_track", "search_artists_ms",
+                     "cache_hit_ms", "memory_peak_kib"):
+            self.assertIn(name, metrics)
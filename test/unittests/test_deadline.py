@@ -0,0 +1,88 @@
+import time
+import unittest
+from threading import Event
+
+from skill_ovos_soundcloud.deadline import Deadline, DeadlineExceeded, \
+    iterate_until
+
+
+def gated_gen(n, gate, produced, finished):
+    """ yields 2 items right away, the rest only once gate is set """
+    try:
+        for i in range(n):
+            if i == 2:
+                gate.wait(10)
+            produced.append(i)
+            yield i
+    finally:
+        finished.set()
+
+
+class TestDeadline(unittest.TestCase):
+    def test_no_timeout(self):
+        deadline = Deadline(None)
+        self.assertIsNone(deadline.remaining)
+        self.assertFalse(deadline.expired)
+        self.assertEqual(list(iterate_until(range, 3, deadline=deadline)),
+                         [0, 1, 2])
+
+    def test_expired(self):
+        self.assertFalse(Deadline(60).expired)
+        deadline = Deadline(0.01)
+        time.sleep(0.05)
+        self.assertTrue(deadline.expired)
+        self.assertEqual(deadline.remaining, 0)
+
+    def test_iterate_until(self):
+        gate, finished = Event(), Event()
+        produced = []
+        results = []
+        with self.assertRaises(DeadlineExceeded):
+            for i in iterate_until(gated_gen, 10, gate, produced, finished,
+                                   deadline=Deadline(0.2)):
+                results.append(i)
+        self.assertEqual(results, [0, 1])
+        # producer is cancelled, it does not run to completion
+        gate.set()
+        self.assertTrue(finished.wait(5))
+        self.assertLess(len(produced), 10)
+
+    def test_consumer_stops(self):
+        gate, finished = Event(), Event()
+        produced = []
+        for _ in iterate_until(gated_gen, 10, gate, produced, finished,
+                               deadline=Deadline(60)):
+            break
+        gate.set()
+        self.assertTrue(finished.wait(5))
+        self.assertLess(len(produced), 10)
+
+    def test_readahead(self):
+        finished = Event()
+        produced = []
+
+        def gen():
+            try:
+                for i in range(100):
+                    produced.append(i)
+                    yield i
+            finally:
+                finished.set()
+
+        results = iterate_until(gen, deadline=Deadline(60), readahead=5)
+        self.assertEqual(next(results), 0)
+        time.sleep(0.2)
+        # 5 queued, 1 consumed and 1 waiting for room
+        self.assertLessEqual(len(produced), 7)
+        results.close()
+        self.assertTrue(finished.wait(5))
+        # at most the one it was pulling when cancelled
+        self.assertLessEqual(len(produced), 8)
+
+    def test_errors_propagate(self):
+        def broken():
+            yield 1
+            raise ValueError("upstream error")
+
+        with self.assertRaises(ValueError):
+            list(iterate_until(broken, deadline=Deadline(5)))
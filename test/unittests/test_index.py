@@ -0,0 +1,44 @@
+import unittest
+
+from skill_ovos_soundcloud.index import TrackIndex, trigrams
+
+
+def track(title, artist):
+    return {"title": title, "artist": artist, "duration": 200, "image": "",
+            "url": f"https://soundcloud.com/{artist}/{title}"}
+
+
+class TestTrackIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = TrackIndex()
+        self.index.add([track("nuclear chill", "Piratech"),
+                        track("slow", "Piratech"),
+                        track("lost", "JoR"),
+                        track("tribe", "Tezin Pirateuh Tribe")])
+
+    def test_trigrams(self):
+        self.assertEqual(trigrams("JoR!"), {" jo", "jor", "or "})
+        self.assertEqual(trigrams(""), set())
+
+    def test_search(self):
+        matches = self.index.search("piratech")
+        self.assertEqual([t["title"] for _, t in matches],
+                         ["nuclear chill", "slow", "tribe"])
+        self.assertEqual(matches[0][0], 1.0)
+        self.assertLess(matches[2][0], 1.0)  # "pirate" only
+        # typos and partial phrases still overlap
+        self.assertEqual(self.index.search("piratek nuclear")[0][1]["title"],
+                         "nuclear chill")
+        self.assertEqual(self.index.search("unknown"), [])
+        self.assertEqual(len(self.index.search("piratech", limit=1)), 1)
+
+    def test_add(self):
+        self.assertEqual(self.index.add([track("slow", "Piratech")]), 0)
+        self.assertEqual(len(self.index), 4)
+        self.assertIn("https://soundcloud.com/JoR/lost", self.index)
+
+        index = TrackIndex(max_tracks=2)
+        self.assertEqual(index.add([track(str(i), "JoR") for i in range(5)]), 2)
+        self.assertEqual(len(index), 2)
+        index.clear()
+        self.assertEqual(index.search("jor"), [])
@@ -0,0 +1,49 @@
+import unittest
+
+from skill_ovos_soundcloud.metrics import Histogram, SearchMetrics
+
+
+class TestMetrics(unittest.TestCase):
+    def test_histogram(self):
+        h = Histogram()
+        for ms in (0.2, 0.3, 2, 3, 4, 40, 400, 4000):
+            h.observe(ms)
+        self.assertEqual(h.count, 8)
+        self.assertEqual(h.min, 0.2)
+        self.assertEqual(h.max, 4000)
+        self.assertEqual(h.percentile(0.5), 5)
+        self.assertEqual(h.percentile(1), 4000)
+        self.assertEqual(sum(h.as_dict()["buckets"].values()), 8)
+        self.assertEqual(Histogram().percentile(0.5), 0)
+
+    def test_counters_and_timers(self):
+        metrics = SearchMetrics()
+        metrics.incr("previews_filtered.tracks")
+        metrics.incr("previews_filtered.tracks", 2)
+        with metrics.timer("score"):
+            pass
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot["counters"]["previews_filtered.tracks"], 3)
+        self.assertEqual(snapshot["histograms"]["score"]["count"], 1)
+        self.assertIn("previews_filtered.tracks=3", metrics.summary())
+        metrics.reset()
+        self.assertEqual(metrics.snapshot(),
+                         {"counters": {}, "histograms": {}})
+
+    def test_timed(self):
+        closed = []
+
+        def gen():
+            try:
+                yield from range(10)
+            finally:
+                closed.append(True)
+
+        metrics = SearchMetrics()
+        self.assertEqual(list(metrics.timed("upstream.tracks", gen())),
+                         list(range(10)))
+        for _ in metrics.timed("upstream.tracks", gen()):
+            break
+        # abandoned iterators are closed and still observed
+        self.assertEqual(closed, [True, True])
+        self.assertEqual(metrics.histograms["upstream.tracks"].count, 2)
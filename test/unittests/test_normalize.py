@@ -0,0 +1,33 @@
+import unittest
+
+from skill_ovos_soundcloud.normalize import normalize_phrase
+
+
+class TestNormalize(unittest.TestCase):
+    def test_case_and_whitespace(self):
+        self.assertEqual(normalize_phrase("Piratech"), "piratech")
+        self.assertEqual(normalize_phrase("  piratech \t"), "piratech")
+        self.assertEqual(normalize_phrase("Nuclear   CHILL"), "nuclear chill")
+
+    def test_punctuation(self):
+        self.assertEqual(normalize_phrase("piratech - nuclear chill!"),
+                         "piratech nuclear chill")
+        self.assertEqual(normalize_phrase("piratech_corexd"),
+                         "piratech corexd")
+
+    def test_unicode(self):
+        self.assertEqual(normalize_phrase("ＰＩＲＡＴＥＣＨ"), "piratech")
+        self.assertEqual(normalize_phrase("STRASSE"), normalize_phrase("straße"))
+        self.assertEqual(normalize_phrase("café"), "café")
+
+    def test_stopwords(self):
+        voc = ["soundcloud", "sound cloud", "on soundcloud", "on sound cloud"]
+        self.assertEqual(normalize_phrase("piratech on soundcloud", voc),
+                         "piratech")
+        self.assertEqual(normalize_phrase("Piratech on Sound Cloud", voc),
+                         "piratech")
+        # only whole words are removed
+        self.assertEqual(normalize_phrase("soundclouders", voc),
+                         "soundclouders")
+        # never strip the whole query
+        self.assertEqual(normalize_phrase("SoundCloud", voc), "soundcloud")
@@ -0,0 +1,69 @@
+import unittest
+
+from ovos_utils.ocp import MediaType, PlaybackType, PluginStream
+
+from skill_ovos_soundcloud.playlist import LazyPlaylist, entry2track
+
+
+def track(i):
+    return {"title": f"track {i}", "artist": "Piratech", "duration": 200,
+            "image": "", "url": f"https://soundcloud.com/piratech/{i}"}
+
+
+def factory(built):
+    def build(t, idx):
+        built.append(idx)
+        return PluginStream(extractor_id="ydl", stream=t["url"],
+                            title=t["title"], artist=t["artist"],
+                            match_confidence=50, media_type=MediaType.MUSIC,
+                            playback=PlaybackType.AUDIO,
+                            length=t["duration"] * 1000, image=t["image"])
+    return build
+
+
+class TestLazyPlaylist(unittest.TestCase):
+    def test_lazy(self):
+        built = []
+        pl = LazyPlaylist(title="Piratech (Featured Tracks)",
+                          tracks=[track(i) for i in range(5)],
+                          factory=factory(built))
+        self.assertEqual(len(pl), 5)
+        self.assertTrue(pl)
+        self.assertEqual(pl.pending, 5)
+        self.assertEqual(pl.streams[0], "https://soundcloud.com/piratech/0")
+        self.assertEqual(built, [])
+        # reading the contents builds every entry, once
+        self.assertEqual(pl[0].title, "track 0")
+        self.assertEqual(built, [0, 1, 2, 3, 4])
+        self.assertEqual(pl.pending, 0)
+        self.assertEqual(len(pl.as_dict["playlist"]), 5)
+        self.assertEqual(built, [0, 1, 2, 3, 4])
+
+    def test_eager_entries_first(self):
+        built = []
+        build = factory(built)
+        pl = LazyPlaylist(factory=build)
+        pl.append(build(track(0), 0))
+        pl.defer([track(1), track(2)])
+        self.assertEqual(len(pl), 3)
+        self.assertEqual([e.title for e in pl],
+                         ["track 0", "track 1", "track 2"])
+        self.assertEqual(built, [0, 1, 2])
+
+    def test_lazy_dict(self):
+        built = []
+        build = factory(built)
+        pl = LazyPlaylist(title="Piratech (Featured Tracks)",
+                          match_confidence=80, factory=build)
+        pl.append(build(track(0), 0))
+        pl.defer([track(1)])
+        data = pl.as_lazy_dict
+        self.assertEqual(data["tracks"], [track(0), track(1)])
+        self.assertEqual(data["match_confidence"], 80)
+        self.assertEqual(entry2track(pl[0]), track(0))
+
+    def test_clear(self):
+        pl = LazyPlaylist(tracks=[track(0)], factory=factory([]))
+        pl.clear()
+        self.assertEqual(len(pl), 0)
+        self.assertEqual(list(pl), [])
@@ -0,0 +1,49 @@
+import unittest
+from threading import Event
+
+from skill_ovos_soundcloud.prefetch import Prefetcher
+
+
+class TestPrefetcher(unittest.TestCase):
+    def get_prefetcher(self, queries, refreshed, **kwargs):
+        kwargs.setdefault("delay", 0)
+        kwargs.setdefault("idle", 0)
+        return Prefetcher(lambda: list(queries),
+                          lambda t, p: refreshed.append((t, p)), **kwargs)
+
+    def test_run_once(self):
+        queries = [("artists", str(i)) for i in range(10)]
+        refreshed = []
+        prefetcher = self.get_prefetcher(queries, refreshed, max_queries=3)
+        self.assertEqual(prefetcher.run_once(), 3)
+        self.assertEqual(refreshed, queries[:3])
+
+    def test_busy(self):
+        refreshed = []
+        prefetcher = self.get_prefetcher([("artists", "piratech")], refreshed,
+                                         idle=60)
+        prefetcher.notify_search()
+        self.assertFalse(prefetcher.is_idle)
+        self.assertEqual(prefetcher.run_once(), 0)
+        self.assertEqual(refreshed, [])
+
+    def test_errors(self):
+        def refresh(searchtype, phrase):
+            if phrase == "broken":
+                raise ConnectionError("soundcloud is down")
+
+        prefetcher = Prefetcher(lambda: [("artists", "broken"),
+                                         ("artists", "piratech")],
+                                refresh, delay=0, idle=0)
+        self.assertEqual(prefetcher.run_once(), 1)
+
+    def test_background(self):
+        done = Event()
+        prefetcher = Prefetcher(lambda: [("artists", "piratech")],
+                                lambda t, p: done.set(),
+                                interval=0.01, delay=0, idle=0)
+        prefetcher.start()
+        try:
+            self.assertTrue(done.wait(5))
+        finally:
+            prefetcher.stop()
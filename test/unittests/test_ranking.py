@@ -0,0 +1,50 @@
+import unittest
+
+from skill_ovos_soundcloud.ranking import artist_key, merge_artists, \
+    unseen_tracks
+
+
+def track(title, artist):
+    return {"title": title, "artist": artist, "duration": 200, "image": "",
+            "url": f"https://soundcloud.com/{artist}/{title}"}
+
+
+class TestRanking(unittest.TestCase):
+    def test_artist_key(self):
+        self.assertEqual(artist_key("Piratech"), artist_key("piratech "))
+        self.assertEqual(artist_key("JoR"), artist_key("jor"))
+        self.assertEqual(artist_key("lofi.samurai"), artist_key("Lofi Samurai"))
+        self.assertNotEqual(artist_key("JoR"), artist_key("JORR"))
+
+    def test_merge_artists(self):
+        shared = track("nuclear chill", "piratech")
+        people = [{"artist": "Piratech", "tracks": [track("slow", "Piratech"),
+                                                    shared]},
+                  {"artist": "piratech", "tracks": [shared,
+                                                    track("remix", "piratech")]},
+                  {"artist": "JoR", "tracks": [track("lost", "JoR")]},
+                  {"artist": "Piratech", "tracks": [track("late", "Piratech")]}]
+        merged = list(merge_artists(people))
+        self.assertEqual([p["artist"] for p in merged],
+                         ["Piratech", "JoR", "Piratech"])
+        self.assertEqual([t["title"] for t in merged[0]["tracks"]],
+                         ["slow", "nuclear chill", "remix"])
+        # the upstream dicts are not changed
+        self.assertEqual(len(people[0]["tracks"]), 2)
+
+    def test_merge_artists_error(self):
+        def people():
+            yield {"artist": "JoR", "tracks": []}
+            raise TimeoutError
+
+        results = []
+        with self.assertRaises(TimeoutError):
+            for p in merge_artists(people()):
+                results.append(p)
+        self.assertEqual(len(results), 1)
+
+    def test_unseen_tracks(self):
+        seen = {track("slow", "Piratech")["url"]}
+        tracks = [track("slow", "Piratech"), track("remix", "piratech")]
+        self.assertEqual(unseen_tracks(tracks, seen), tracks[1:])
+        self.assertEqual(unseen_tracks(tracks, seen), [])
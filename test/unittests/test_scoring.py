@@ -0,0 +1,122 @@
+import unittest
+
+from ovos_utils.parse import fuzzy_match, MatchStrategy
+
+from skill_ovos_soundcloud import SoundCloudSkill
+from skill_ovos_soundcloud.scoring import DurationRules, QueryScorer
+
+
+def reference_score(phrase, match, base_score=0, idx=0, searchtype="tracks"):
+    """ the original SoundCloudSkill.calc_score """
+    score = base_score
+    title_score = 100 * fuzzy_match(
+        phrase.lower().strip(),
+        match["title"].lower().strip(),
+        strategy=MatchStrategy.DAMERAU_LEVENSHTEIN_SIMILARITY)
+    artist_score = 100 * fuzzy_match(
+        phrase.lower().strip(),
+        match["artist"].lower().strip(),
+        strategy=MatchStrategy.DAMERAU_LEVENSHTEIN_SIMILARITY)
+    if searchtype == "artists":
+        score += artist_score
+    elif searchtype == "tracks":
+        if artist_score >= 75:
+            score += artist_score * 0.5 + title_score * 0.5
+        else:
+            score += title_score * 0.85 + artist_score * 0.15
+        score -= idx * 2
+    else:
+        if artist_score >= 85:
+            score += artist_score * 0.85 + title_score * 0.15
+        elif artist_score >= 70:
+            score += artist_score * 0.7 + title_score * 0.3
+        elif artist_score >= 50:
+            score += title_score * 0.5 + artist_score * 0.5
+        else:
+            score += title_score * 0.7 + artist_score * 0.3
+    score = min((100, score))
+    return score
+
+
+PHRASES = ["piratech", " Piratech ", "nuclear chill", "piratech nuclear",
+           "jor", "", "tezin pirateuh tribe"]
+MATCHES = [{"title": t, "artist": a}
+           for t in ("nuclear chill", "Nuclear Chill (remix)", "slow", "",
+                     "a very long title that matches nothing at all")
+           for a in ("Piratech", "piratech", "PARATECH", "piratech_corexd",
+                     "JoR", "Tezin Pirateuh Tribe", "")]
+SEARCH_TYPES = ["artists", "sets", "tracks", "generic"]
+
+
+class TestScoring(unittest.TestCase):
+    def test_identical_scores(self):
+        for searchtype in SEARCH_TYPES:
+            for phrase in PHRASES:
+                for base_score in (0, 15, 50):
+                    scorer = QueryScorer(phrase, searchtype, base_score)
+                    for idx, match in enumerate(MATCHES):
+                        expected = reference_score(phrase, match, base_score,
+                                                   idx, searchtype)
+                        self.assertEqual(scorer.score(match, idx), expected)
+                        self.assertEqual(
+                            SoundCloudSkill.calc_score(phrase, match,
+                                                       base_score, idx,
+                                                       searchtype),
+                            expected)
+
+    def test_score_many(self):
+        for searchtype in SEARCH_TYPES:
+            scorer = QueryScorer("piratech", searchtype)
+            self.assertEqual(
+                scorer.score_many(MATCHES, start=3),
+                [reference_score("piratech", m, idx=idx, searchtype=searchtype)
+                 for idx, m in enumerate(MATCHES, 3)])
+
+    def test_min_score(self):
+        for searchtype in SEARCH_TYPES:
+            scorer = QueryScorer("piratech", searchtype)
+            for idx, match in enumerate(MATCHES):
+                expected = reference_score("piratech", match, idx=idx,
+                                           searchtype=searchtype)
+                score = scorer.score(match, idx, min_score=50)
+                if expected >= 50:
+                    self.assertEqual(score, expected)
+                else:
+                    self.assertIsNone(score)
+
+    def test_artist_cache(self):
+        scorer = QueryScorer("piratech", "sets")
+        scorer.score_many([{"title": str(i), "artist": "Piratech"}
+                           for i in range(10)])
+        self.assertEqual(list(scorer._artists), ["Piratech"])
+
+    def test_title_cache(self):
+        scorer = QueryScorer("piratech", "sets")
+        match = {"title": "nuclear chill", "artist": "Piratech"}
+        scores = scorer.score_many([match, dict(match, artist="JoR"), match])
+        self.assertEqual(list(scorer._titles), ["nuclear chill"])
+        self.assertEqual(scores[0], scores[2])
+
+    def test_length_penalty(self):
+        durations = DurationRules(penalty_after=600, penalty=1)
+        scorer = QueryScorer("piratech", "sets", durations=durations)
+        match = {"title": "nuclear chill", "artist": "Piratech"}
+        expected = reference_score("piratech", match, searchtype="sets")
+        self.assertEqual(scorer.score(dict(match, duration=300)), expected)
+        self.assertEqual(scorer.score(dict(match, duration=900)),
+                         expected - 5)
+        self.assertIsNone(scorer.score(dict(match, duration=900),
+                                       min_score=expected - 4))
+
+
+class TestDurationRules(unittest.TestCase):
+    def test_reject(self):
+        durations = DurationRules(min_duration=60, max_duration=45 * 60)
+        self.assertEqual(durations.reject({"duration": 30}), "previews")
+        self.assertEqual(durations.reject({"duration": 60}), "previews")
+        self.assertIsNone(durations.reject({"duration": 61}))
+        self.assertIsNone(durations.reject({"duration": 60 * 60}))
+        self.assertEqual(durations.reject({"duration": 60 * 60}, songs=True),
+                         "long_tracks")
+        durations.max_duration = 0
+        self.assertIsNone(durations.reject({"duration": 60 * 60}, songs=True))
@@ -0,0 +1,730 @@
+import time
+import unittest
+from shutil import rmtree
+from tempfile import mkdtemp
+from threading import BoundedSemaphore, Event
+from unittest.mock import PropertyMock, patch
+
+from ovos_bus_client.message import Message
+from ovos_utils.fakebus import FakeBus
+from ovos_utils.ocp import MediaEntry, MediaType, Playlist, PluginStream
+
+import skill_ovos_soundcloud
+from skill_ovos_soundcloud import SoundCloudSkill
+from skill_ovos_soundcloud.cache import SearchCache
+from skill_ovos_soundcloud.playlist import LazyPlaylist
+from skill_ovos_soundcloud.singleflight import SingleFlight
+from skill_ovos_soundcloud.streams import StreamResolver
+
+
+def track(title, artist, duration=200):
+    return {"title": title, "artist": artist, "duration": duration,
+            "image": "", "url": f"https://soundcloud.com/{artist}/{title}"}
+
+
+class FakeSoundCloud:
+    gate = None  # Event, upstream searches block until it is set
+
+    @classmethod
+    def wait(cls):
+        if cls.gate is not None:
+            cls.gate.wait(10)
+
+    @classmethod
+    def search_tracks(cls, query):
+        cls.wait()
+        yield track("nuclear chill", "piratech")
+        yield track("preview", "piratech", duration=30)
+        yield track("slow", "piratech", duration=240)
+
+    @classmethod
+    def search_people(cls, query):
+        cls.wait()
+        yield {"artist": "Piratech",
+               "tracks": [track("nuclear chill", "Piratech"),
+                          track("slow", "Piratech")]}
+        yield {"artist": "JoR", "tracks": [track("lost", "JoR")]}
+        yield {"artist": "Tezin Pirateuh Tribe",
+               "tracks": [track("tribe", "Tezin Pirateuh Tribe")]}
+
+    @classmethod
+    def search_sets(cls, query):
+        cls.wait()
+        # shares a track with the artist "Featured Tracks"
+        yield {"title": "best of piratech",
+               "tracks": [track("nuclear chill", "Piratech"),
+                          track("remix", "piratech")]}
+        # identical to the artist "Featured Tracks"
+        yield {"title": "JoR",
+               "tracks": [track("lost", "JoR")]}
+
+
+class TestSearch(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.patcher = patch.object(skill_ovos_soundcloud, "SoundCloud",
+                                   FakeSoundCloud)
+        cls.patcher.start()
+        cls.skill = SoundCloudSkill(bus=FakeBus(),
+                                    skill_id="skill-ovos-soundcloud.test")
+        cls.skill._warmup_thread.join()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.patcher.stop()
+
+    def setUp(self):
+        self.folder = mkdtemp()
+        self.skill._search_cache = SearchCache(xdg_folder=self.folder)
+        self.skill._inflight = SingleFlight()
+        self.skill._metrics.reset()
+        self.skill._breaker.success()
+        self.skill._index.clear()
+        self.skill.settings["search_timeout"] = 4
+        FakeSoundCloud.gate = None
+
+    def tearDown(self):
+        if FakeSoundCloud.gate is not None:
+            FakeSoundCloud.gate.set()  # release blocked searches
+        rmtree(self.folder, ignore_errors=True)
+
+    def test_search_artists(self):
+        results = list(self.skill.search_artists("piratech", MediaType.MUSIC))
+        self.assertEqual([r.title for r in results],
+                         ["Piratech (Featured Tracks)", "JoR (Featured Tracks)",
+                          "Tezin Pirateuh Tribe (Featured Tracks)"])
+        self.assertTrue(all(isinstance(r, Playlist) for r in results))
+        # served from cache
+        cached = list(self.skill.search_artists("Piratech ", MediaType.MUSIC))
+        self.assertEqual([r.title for r in cached], [r.title for r in results])
+        self.assertEqual(self.skill._search_cache.hits, 1)
+
+    def test_lazy_playlists(self):
+        self.skill.settings["playlist_score_tracks"] = 1
+        try:
+            with patch.object(self.skill, "_track2entry",
+                              wraps=self.skill._track2entry) as track2entry:
+                results = list(self.skill.search_artists("piratech",
+                                                         MediaType.MUSIC))
+                # the second Piratech track is neither scored nor built
+                self.assertEqual(track2entry.call_count, 3)
+                self.assertIsInstance(results[0], LazyPlaylist)
+                self.assertEqual(results[0].pending, 1)
+                self.assertEqual(len(results[0]), 2)
+                # cached in the lightweight form
+                entry = self.skill._search_cache.get("artists", "piratech")[0]
+                self.assertEqual(len(entry["tracks"]), 2)
+                self.assertEqual(track2entry.call_count, 3)
+
+                cached = list(self.skill.search_artists("piratech",
+                                                        MediaType.MUSIC))
+                self.assertEqual(track2entry.call_count, 3)
+                data = cached[0].as_dict
+                self.assertEqual(track2entry.call_count, 5)
+        finally:
+            self.skill.settings["playlist_score_tracks"] = 3
+        self.assertEqual(data["title"], "Piratech (Featured Tracks)")
+        self.assertEqual(data["match_confidence"],
+                         results[0].match_confidence)
+        self.assertEqual([e["title"] for e in data["playlist"]],
+                         ["nuclear chill", "slow"])
+
+    def test_prefetch(self):
+        list(self.skill.search_artists("piratech", MediaType.MUSIC))
+        self.skill.settings["prefetch_artists"] = ["JoR", "Piratech"]
+        self.skill.settings["prefetch_refresh_before"] = 0
+        try:
+            # piratech is cached and not about to expire
+            self.assertEqual(self.skill._prefetch_candidates(),
+                             [("artists", "jor")])
+            self.skill._prefetch("artists", "jor")
+            self.assertEqual(self.skill._prefetch_candidates(), [])
+            self.assertEqual(len(self.skill._search_cache.get("artists",
+                                                              "jor")), 3)
+            # everything expires within a ttl
+            self.skill.settings["prefetch_refresh_before"] = \
+                self.skill._search_cache.ttl
+            self.assertEqual(sorted(self.skill._prefetch_candidates()),
+                             [("artists", "jor"), ("artists", "piratech")])
+        finally:
+            self.skill.settings["prefetch_artists"] = []
+            self.skill.settings["prefetch_refresh_before"] = 24 * 60 * 60
+
+    def test_cached_tracks(self):
+        results = list(self.skill.search_tracks("piratech", MediaType.MUSIC))
+        with patch.object(skill_ovos_soundcloud, "dict2entry") as dict2entry:
+            cached = list(self.skill.search_tracks("piratech",
+                                                   MediaType.MUSIC))
+        dict2entry.assert_not_called()
+        self.assertEqual([r.as_dict for r in cached],
+                         [r.as_dict for r in results])
+
+    def test_search_parallel(self):
+        results = list(self.skill.search_parallel("piratech", MediaType.MUSIC))
+        titles = [r.title for r in results]
+        self.assertIn("Piratech (Featured Tracks)", titles)
+        self.assertIn("best of piratech (Playlist)", titles)
+        # JoR set is a duplicate, the preview is not a track result
+        self.assertEqual(len(titles), 6)
+        self.assertIn("slow", titles)
+        # every track is only yielded once
+        playlists = [r for r in results if isinstance(r, Playlist)]
+        streams = [e.stream for pl in playlists for e in pl]
+        self.assertEqual(len(streams), len(set(streams)))
+        self.assertEqual(len(streams), 5)
+
+    def test_search_parallel_timeout(self):
+        FakeSoundCloud.gate = Event()
+        start = time.monotonic()
+        results = list(self.skill.search_parallel("piratech", MediaType.MUSIC,
+                                                  timeout=0.2))
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertEqual(results, [])
+
+    def test_invalid_search_types(self):
+        self.skill.settings["search_types"] = ["artists", "albums"]
+        try:
+            results = list(self.skill.search_ocp("piratech", MediaType.MUSIC))
+        finally:
+            self.skill.settings["search_types"] = ["artists"]
+        self.assertEqual(len(results), 3)
+
+    def test_lang_resolved_once(self):
+        self.skill.settings["search_types"] = ["artists", "sets"]
+        try:
+            with patch.object(SoundCloudSkill, "lang", new_callable=PropertyMock,
+                              return_value="en-us") as lang:
+                results = list(self.skill.search_ocp("piratech on soundcloud",
+                                                     MediaType.MUSIC))
+        finally:
+            self.skill.settings["search_types"] = ["artists"]
+        self.assertEqual(lang.call_count, 1)
+        self.assertEqual(len(results), 4)
+        self.assertEqual(self.skill._search_cache.get("sets", "piratech")[0]
+                         ["title"], "best of piratech (Playlist)")
+
+    def test_upstream_timeout(self):
+        FakeSoundCloud.gate = Event()
+        self.skill.settings["search_timeout"] = 0.2
+        start = time.monotonic()
+        results = list(self.skill.search_artists("piratech", MediaType.MUSIC))
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertEqual(results, [])
+        # nothing was fetched, nothing to cache
+        self.assertEqual(len(self.skill._search_cache), 0)
+
+    def test_abandoned_search_is_cached(self):
+        for r in self.skill.search_artists("piratech", MediaType.MUSIC):
+            break  # OCP got what it needed
+        cache = self.skill._search_cache
+        self.assertIsNone(cache.get("artists", "piratech"))
+        entry = cache.lookup("artists", "piratech")
+        self.assertFalse(entry["complete"])
+        self.assertEqual(len(entry["results"]), 1)
+
+        # partial entry is topped up, known playlists are not rebuilt
+        with patch.object(self.skill, "_track2entry",
+                          wraps=self.skill._track2entry) as track2entry:
+            results = list(self.skill.search_artists("piratech",
+                                                     MediaType.MUSIC))
+        # only the tracks of JoR and Tezin Pirateuh Tribe were scored
+        self.assertEqual(track2entry.call_count, 2)
+        self.assertEqual([r.title for r in results],
+                         ["Piratech (Featured Tracks)", "JoR (Featured Tracks)",
+                          "Tezin Pirateuh Tribe (Featured Tracks)"])
+        self.assertEqual(len(cache.get("artists", "piratech")), 3)
+
+    def test_failed_top_up_keeps_age(self):
+        self.skill.settings["upstream_backoff"] = 0.01
+        cache = self.skill._search_cache
+        with patch("skill_ovos_soundcloud.cache.time.time",
+                   return_value=time.time() - 60):
+            cache.put("tracks", "piratech", [
+                dict(track("nuclear chill", "piratech"),
+                     match_confidence=90)], complete=False)
+
+        def unreachable(query):
+            raise ConnectionError("soundcloud is down")
+            yield
+
+        try:
+            with patch.object(FakeSoundCloud, "search_tracks", unreachable):
+                results = list(self.skill.search_soundcloud("piratech",
+                                                            "tracks"))
+        finally:
+            self.skill.settings["upstream_backoff"] = 0.5
+        self.assertEqual([r.title for r in results], ["nuclear chill"])
+        # not written back as if it was just fetched
+        self.assertGreaterEqual(cache.age("tracks", "piratech"), 60)
+        self.assertFalse(cache.lookup("tracks", "piratech")["complete"])
+
+    def test_concurrent_searches_coalesce(self):
+        calls = []
+        search_people = FakeSoundCloud.search_people
+
+        def counting(query):
+            calls.append(query)
+            return search_people(query)
+
+        with patch.object(FakeSoundCloud, "search_people", counting):
+            searches = [self.skill.search_artists(p, MediaType.MUSIC)
+                        for p in ("piratech", "Piratech", "piratech!")]
+            first = [next(s) for s in searches]
+            results = [[f] + list(s) for f, s in zip(first, searches)]
+        self.assertEqual(len(calls), 1)
+        for r in results:
+            self.assertEqual(len(r), 3)
+
+    def test_metrics(self):
+        list(self.skill.search_tracks("piratech", MediaType.MUSIC))
+        list(self.skill.search_tracks("piratech", MediaType.MUSIC))
+        metrics = self.skill.get_metrics()
+        self.assertEqual(metrics["counters"]["previews_filtered.tracks"], 1)
+        self.assertEqual(metrics["histograms"]["upstream.tracks"]["count"], 1)
+        self.assertEqual(metrics["histograms"]["score"]["count"], 2)
+        self.assertEqual(metrics["histograms"]["store"]["count"], 1)
+        self.assertEqual(metrics["cache"]["hits"], 1)
+        self.assertEqual(metrics["cache"]["misses"], 1)
+
+        response = self.skill.bus.wait_for_response(
+            Message("ovos.soundcloud.metrics"))
+        self.assertEqual(response.data["counters"], metrics["counters"])
+
+    def test_stale_results_when_unreachable(self):
+        self.skill.settings["upstream_backoff"] = 0.01
+        self.skill._search_cache = SearchCache(xdg_folder=self.folder,
+                                               stale_if_error=3600)
+        results = list(self.skill.search_artists("piratech", MediaType.MUSIC))
+        self.skill._search_cache.ttl = 0  # expired, but kept
+        self.assertIsNone(self.skill._search_cache.get("artists", "piratech"))
+
+        calls = []
+
+        def unreachable(query):
+            calls.append(query)
+            raise ConnectionError("soundcloud is down")
+            yield
+
+        threshold = self.skill._breaker.threshold
+        with patch.object(FakeSoundCloud, "search_people", unreachable):
+            for _ in range(threshold):
+                stale = list(self.skill.search_artists("piratech",
+                                                       MediaType.MUSIC))
+                self.assertEqual([r.title for r in stale],
+                                 [r.title for r in results])
+            # search failed once and was retried once, every time
+            self.assertEqual(len(calls), 2 * threshold)
+            self.assertTrue(self.skill._breaker.is_open)
+            # fast fail, soundcloud is not even searched
+            stale = list(self.skill.search_artists("piratech",
+                                                   MediaType.MUSIC))
+            self.assertEqual(len(stale), 3)
+            self.assertEqual(len(calls), 2 * threshold)
+            # nothing to fall back to
+            self.assertEqual(list(self.skill.search_artists(
+                "unknown", MediaType.MUSIC)), [])
+
+        counters = self.skill.get_metrics()["counters"]
+        self.assertEqual(counters["errors.artists"], threshold)
+        self.assertEqual(counters["circuit_open.artists"], 2)
+        self.assertEqual(counters["stale.artists"], threshold + 1)
+        # stale results are not cached as fresh ones
+        self.assertIsNone(self.skill._search_cache.get("artists", "piratech"))
+        self.skill.settings["upstream_backoff"] = 0.5
+
+    def test_abandoned_trial(self):
+        breaker = self.skill._breaker
+        breaker.cooldown = 0.05
+        breaker.failure()
+        breaker.failure()
+        breaker.failure()
+        try:
+            time.sleep(0.1)
+            # OCP stops at the first result of the trial search
+            search = self.skill.search_soundcloud("piratech", "tracks")
+            next(search)
+            search.close()
+            self.assertFalse(breaker.is_open)
+            self.assertTrue(breaker.allow())
+
+            # abandoned before soundcloud answered, while the cached part of
+            # a partial entry was served
+            self.skill._search_cache.put("tracks", "lofi", [
+                dict(track("lofi", "JoR"), match_confidence=80)],
+                complete=False)
+            for _ in range(breaker.threshold):
+                breaker.failure()
+            time.sleep(0.1)
+            search = self.skill._search_upstream(
+                "lofi", "tracks", "lofi",
+                self.skill._search_cache.lookup("tracks", "lofi"))
+            next(search)
+            search.close()
+            # the next search is the trial
+            self.assertTrue(breaker.allow())
+        finally:
+            breaker.cooldown = 60
+
+    def test_trial_timeout_after_partial_answer(self):
+        breaker = self.skill._breaker
+        breaker.cooldown = 0.05
+        for _ in range(breaker.threshold):
+            breaker.failure()
+        self.skill.settings["search_timeout"] = 0.2
+
+        def slow_tracks(query):
+            yield track("nuclear chill", "piratech")
+            time.sleep(1)
+            yield track("slow", "piratech")
+
+        try:
+            time.sleep(0.1)
+            with patch.object(FakeSoundCloud, "search_tracks", slow_tracks):
+                results = list(self.skill.search_soundcloud("piratech",
+                                                            "tracks"))
+        finally:
+            breaker.cooldown = 60
+        self.assertEqual(len(results), 1)
+        self.assertEqual(
+            self.skill.get_metrics()["counters"]["timeouts.tracks"], 1)
+        # soundcloud answered, the circuit is closed
+        self.assertFalse(breaker.is_open)
+        self.assertTrue(breaker.allow())
+
+    def test_stale_while_revalidate(self):
+        list(self.skill.search_artists("piratech", MediaType.MUSIC))
+        def created():
+            return time.time() - self.skill._search_cache.age("artists",
+                                                              "piratech")
+
+        fetched = created()
+        self.skill.settings["cache_soft_ttl"] = 0.01
+        time.sleep(0.02)
+        calls = []
+        search_people = FakeSoundCloud.search_people
+
+        def counting(query):
+            calls.append(query)
+            return search_people(query)
+
+        FakeSoundCloud.gate = Event()  # soundcloud is slow
+        try:
+            with patch.object(FakeSoundCloud, "search_people", counting):
+                start = time.monotonic()
+                for _ in range(3):
+                    results = list(self.skill.search_artists(
+                        "piratech", MediaType.MUSIC))
+                    self.assertEqual(len(results), 3)
+                # served from the cache without waiting on soundcloud
+                self.assertLess(time.monotonic() - start, 1)
+                self.assertEqual(self.skill._revalidating,
+                                 {("artists", "piratech")})
+                FakeSoundCloud.gate.set()
+                for _ in range(50):
+                    if not self.skill._revalidating:
+                        break
+                    time.sleep(0.05)
+        finally:
+            self.skill.settings["cache_soft_ttl"] = 24 * 60 * 60
+        # refreshed once in the background
+        self.assertEqual(len(calls), 1)
+        self.assertGreater(created(), fetched)
+        counters = self.skill.get_metrics()["counters"]
+        self.assertEqual(counters["revalidate.artists"], 1)
+
+    def test_local_index(self):
+        list(self.skill.search_artists("piratech", MediaType.MUSIC))
+        self.assertEqual(len(self.skill._index), 4)
+
+        # known tracks are yielded before searching soundcloud
+        FakeSoundCloud.gate = Event()
+        self.skill.settings["search_timeout"] = 0.2
+        results = list(self.skill.search_soundcloud("nuclear chill",
+                                                    "tracks", lang="en-us"))
+        self.assertEqual([r.title for r in results], ["nuclear chill"])
+        FakeSoundCloud.gate.set()
+
+        # soundcloud is unreachable and nothing is cached for this query
+        def unreachable(query):
+            raise ConnectionError("soundcloud is down")
+            yield
+
+        self.skill.settings["upstream_backoff"] = 0.01
+        try:
+            with patch.object(FakeSoundCloud, "search_people", unreachable):
+                results = list(self.skill.search_artists("pirate tribe",
+                                                         MediaType.MUSIC))
+        finally:
+            self.skill.settings["upstream_backoff"] = 0.5
+        self.assertEqual([r.title for r in results],
+                         ["Tezin Pirateuh Tribe (Featured Tracks)"])
+
+        # rebuilt from the cache on load
+        self.skill._index.clear()
+        self.skill._load_index()
+        self.assertEqual(len(self.skill._index), 4)
+
+    def test_stream_preresolve(self):
+        resolved = Event()
+
+        def resolve(url):
+            resolved.set()
+            return url + ".mp3"
+
+        self.skill._streams.clear()
+        self.skill._resolver = StreamResolver(resolve, self.skill._background,
+                                              self.skill._streams)
+        try:
+            with patch.object(SoundCloudSkill, "lang", new_callable=PropertyMock,
+                              return_value="en-us"):
+                results = list(self.skill.search_ocp("piratech",
+                                                     MediaType.MUSIC))
+            self.assertTrue(resolved.wait(5))
+            for _ in range(50):
+                if self.skill._streams:
+                    break
+                time.sleep(0.05)
+            # the first track of the best playlist
+            url = track("nuclear chill", "Piratech")["url"]
+            self.assertEqual(results[0].title, "Piratech (Featured Tracks)")
+            self.assertEqual(self.skill._streams.get(url), url + ".mp3")
+
+            entry = self.skill._playable(results[0][0])
+            self.assertIsInstance(entry, MediaEntry)
+            self.assertEqual(entry.uri, url + ".mp3")
+            self.assertEqual(entry.title, "nuclear chill")
+            # not resolved, extracted at playback
+            other = results[1][0]
+            self.assertIs(self.skill._playable(other), other)
+        finally:
+            self.skill._resolver = None
+            self.skill._streams.clear()
+        # resolved streams are never cached
+        for r in self.skill._search_cache.get("artists", "piratech"):
+            self.assertFalse(r["tracks"][0]["url"].endswith(".mp3"))
+
+    def test_duplicates_merged(self):
+        def search_people(query):
+            yield {"artist": "Piratech",
+                   "tracks": [track("nuclear chill", "Piratech"),
+                              track("slow", "Piratech")]}
+            # near-duplicate account
+            yield {"artist": "piratech",
+                   "tracks": [track("slow", "Piratech"),
+                              track("remix", "piratech")]}
+            # shares a track with Piratech
+            yield {"artist": "JoR", "tracks": [track("lost", "JoR"),
+                                               track("slow", "Piratech")]}
+
+        with patch.object(FakeSoundCloud, "search_people", search_people), \
+                patch.object(self.skill, "_track2entry",
+                             wraps=self.skill._track2entry) as track2entry:
+            results = list(self.skill.search_artists("piratech",
+                                                     MediaType.MUSIC))
+            self.assertEqual([r.title for r in results],
+                             ["Piratech (Featured Tracks)",
+                              "JoR (Featured Tracks)"])
+            self.assertEqual([e.title for e in results[0]],
+                             ["nuclear chill", "slow", "remix"])
+            self.assertEqual([e.title for e in results[1]], ["lost"])
+            # every unique track was scored once
+            self.assertEqual(track2entry.call_count, 4)
+        self.assertEqual(
+            self.skill.get_metrics()["counters"]["duplicates.artists"], 1)
+
+    def test_duration_rules(self):
+        def search_tracks(query):
+            yield track("nuclear chill", "piratech")
+            yield track("preview", "piratech", duration=30)
+            yield track("podcast", "piratech", duration=60 * 60)
+            yield track("extended mix", "piratech", duration=20 * 60)
+
+        with patch.object(FakeSoundCloud, "search_tracks", search_tracks), \
+                patch.object(self.skill._durations, "length_penalty",
+                             wraps=self.skill._durations.length_penalty) \
+                as length_penalty:
+            results = list(self.skill.search_tracks("piratech",
+                                                    MediaType.MUSIC))
+            self.assertEqual([r.title for r in results],
+                             ["nuclear chill", "extended mix"])
+            # previews and podcasts are dropped before scoring
+            self.assertEqual(length_penalty.call_count, 2)
+        # 10 minutes over long_track_after
+        self.assertEqual(
+            results[1].match_confidence,
+            self.skill.calc_score("piratech", track("extended mix",
+                                                    "piratech"), idx=1) - 10)
+        counters = self.skill.get_metrics()["counters"]
+        self.assertEqual(counters["previews_filtered.tracks"], 1)
+        self.assertEqual(counters["long_tracks_filtered.tracks"], 1)
+        # podcasts are still indexed, previews are not
+        self.assertIn("https://soundcloud.com/piratech/podcast",
+                      self.skill._index)
+        self.assertNotIn("https://soundcloud.com/piratech/preview",
+                         self.skill._index)
+
+    def test_limits(self):
+        self.skill.settings["max_results"] = 2
+        self.skill.settings["max_playlist_tracks"] = 1
+        try:
+            results = list(self.skill.search_artists("piratech",
+                                                     MediaType.MUSIC))
+        finally:
+            self.skill.settings["max_results"] = 0
+            self.skill.settings["max_playlist_tracks"] = 0
+        self.assertEqual([len(r) for r in results], [1, 1])
+        # complete as far as the limits go
+        self.assertEqual(len(self.skill._search_cache.get("artists",
+                                                          "piratech")), 2)
+
+    def test_limits_per_searchtype(self):
+        self.skill.settings["max_results"] = {"artists": 1}
+        try:
+            self.assertEqual(self.skill._limit("max_results", "artists"), 1)
+            self.assertEqual(self.skill._limit("max_results", "sets"), 0)
+            artists = list(self.skill.search_artists("piratech",
+                                                     MediaType.MUSIC))
+            sets = list(self.skill.search_sets("piratech", MediaType.MUSIC))
+        finally:
+            self.skill.settings["max_results"] = 0
+        self.assertEqual(len(artists), 1)
+        self.assertEqual(len(sets), 2)
+
+    def test_early_stop(self):
+        pages = []
+
+        def search_tracks(query):
+            for page in range(10):
+                pages.append(page)
+                for i in range(10):
+                    yield track(f"piratech {page} {i}", "piratech")
+
+        self.skill.settings["early_stop_results"] = 0
+        try:
+            with patch.object(FakeSoundCloud, "search_tracks", search_tracks):
+                results = list(self.skill.search_soundcloud("piratech",
+                                                            "tracks"))
+        finally:
+            self.skill.settings["early_stop_results"] = 10
+        # idx 33 can score at most 34, below min_track_score
+        self.assertEqual(len(results), 33)
+        # only UPSTREAM_READAHEAD results were fetched ahead
+        self.assertLessEqual(len(pages), 5)
+
+        pages.clear()
+        self.skill._index.clear()  # no instant results
+        self.skill.settings["early_stop_results"] = 3
+        self.skill.settings["early_stop_confidence"] = 70
+        try:
+            with patch.object(FakeSoundCloud, "search_tracks", search_tracks):
+                results = list(self.skill.search_soundcloud("piratech 0",
+                                                            "tracks"))
+        finally:
+            self.skill.settings["early_stop_results"] = 10
+            self.skill.settings["early_stop_confidence"] = 80
+        self.assertEqual(len(results), 3)
+        self.assertTrue(all(r.match_confidence >= 70 for r in results))
+        self.assertLessEqual(len(pages), 2)
+        self.assertEqual(
+            self.skill.get_metrics()["counters"]["early_stop.tracks"], 2)
+
+    def test_search_more(self):
+        def search_tracks(query):
+            for i in range(30):
+                yield track(f"piratech {i}", "piratech")
+
+        self.skill.settings["max_results"] = {"tracks": 5}
+        self.skill.settings["more_results"] = 5
+        try:
+            with patch.object(FakeSoundCloud, "search_tracks", search_tracks):
+                first = list(self.skill.search_soundcloud("piratech",
+                                                          "tracks"))
+                more = list(self.skill.search_more("piratech", "tracks"))
+        finally:
+            self.skill.settings["max_results"] = 0
+            self.skill.settings["more_results"] = 10
+        # event handlers store the settings, they are restored by now
+        with patch.object(FakeSoundCloud, "search_tracks", search_tracks):
+            response = self.skill.bus.wait_for_response(
+                Message("ovos.soundcloud.search.more",
+                        {"phrase": "piratech", "lang": "en-us"}))
+        self.assertEqual([r.title for r in first],
+                         [f"piratech {i}" for i in range(5)])
+        self.assertEqual([r.title for r in more],
+                         [f"piratech {i}" for i in range(5, 10)])
+        self.assertEqual([r["title"] for r in response.data["results"]],
+                         [f"piratech {i}" for i in range(10, 20)])
+        # every page is cached
+        self.assertEqual(len(self.skill._search_cache.get("tracks",
+                                                          "piratech")), 20)
+
+    def test_search_more_offset(self):
+        def search_tracks(query):
+            for i in range(30):
+                yield track(f"piratech {i}", "piratech")
+
+        with patch.object(FakeSoundCloud, "search_tracks", search_tracks):
+            # nothing is cached, eg. it was evicted
+            response = self.skill.bus.wait_for_response(
+                Message("ovos.soundcloud.search.more",
+                        {"phrase": "piratech", "lang": "en-us",
+                         "offset": 5}))
+            self.skill.settings["cache"] = False
+            try:
+                more = list(self.skill.search_more("lofi", "tracks",
+                                                   offset=10))
+            finally:
+                self.skill.settings["cache"] = True
+        self.assertEqual([r.title for r in more],
+                         [f"piratech {i}" for i in range(10, 20)])
+        # the caller's offset
+        self.assertEqual([r["title"] for r in response.data["results"]],
+                         [f"piratech {i}" for i in range(5, 15)])
+
+    def test_background_work_does_not_delay_searches(self):
+        busy = Event()
+        for _ in range(self.skill._limit("background_workers")):
+            self.skill._background.submit(busy.wait, 10)
+        try:
+            start = time.monotonic()
+            results = list(self.skill.search_parallel(
+                "piratech", MediaType.MUSIC, timeout=2))
+            self.assertLess(time.monotonic() - start, 2)
+        finally:
+            busy.set()
+        self.assertEqual(len(results), 6)
+
+    def test_low_resource(self):
+        self.skill.settings["low_resource"] = True
+        self.skill.settings["max_results"] = 5
+        try:
+            self.assertEqual(self.skill._limit("max_results"), 5)
+            self.assertEqual(self.skill._limit("cache_max_entries"), 200)
+            self.assertEqual(self.skill._limit("max_playlist_tracks"), 25)
+            self.assertEqual(self.skill._limit("background_workers"), 1)
+        finally:
+            self.skill.settings["low_resource"] = False
+            self.skill.settings["max_results"] = 0
+        self.assertEqual(self.skill._limit("max_playlist_tracks"), 0)
+
+        memory = self.skill.get_metrics()["memory"]
+        self.assertEqual(memory["cache_bytes"],
+                         self.skill._search_cache.size_bytes)
+        self.assertIn("index_tracks", memory)
+
+    def test_upstream_concurrency(self):
+        self.skill._upstream_slots = BoundedSemaphore(1)
+        self.skill.settings["search_timeout"] = 0.2
+        try:
+            with self.skill._upstream_slots:  # another search is running
+                results = list(self.skill.search_artists("piratech",
+                                                         MediaType.MUSIC))
+            self.assertEqual(results, [])
+            self.assertEqual(self.skill.get_metrics()["counters"]
+                             ["timeouts.artists"], 1)
+            self.skill.settings["search_timeout"] = 4
+            results = list(self.skill.search_artists("piratech",
+                                                     MediaType.MUSIC))
+            self.assertEqual(len(results), 3)
+        finally:
+            self.skill._upstream_slots = None
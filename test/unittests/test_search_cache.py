@@ -0,0 +1,267 @@
+import unittest
+import json
+from os import makedirs
+from os.path import dirname, exists, getmtime, join
+from tempfile import mkdtemp
+from shutil import rmtree
+from unittest.mock import patch
+
+from skill_ovos_soundcloud.cache import SearchCache, JsonCacheBackend, \
+    SQLiteCacheBackend
+
+
+class TestSearchCache(unittest.TestCase):
+    backend = "sqlite"
+
+    def setUp(self):
+        self.folder = mkdtemp()
+
+    def tearDown(self):
+        rmtree(self.folder, ignore_errors=True)
+
+    def get_cache(self, **kwargs):
+        return SearchCache("test.search.history", subfolder="common_play",
+                           xdg_folder=self.folder, backend=self.backend,
+                           **kwargs)
+
+    def test_persistence(self):
+        cache = self.get_cache()
+        cache.put("tracks", "piratech", [{"title": "nuclear chill"}])
+        cache.store()
+
+        cache = self.get_cache()
+        self.assertEqual(cache.get("tracks", "piratech"),
+                         [{"title": "nuclear chill"}])
+        self.assertIsNone(cache.get("artists", "piratech"))
+
+    def test_ttl(self):
+        cache = self.get_cache(ttl=60)
+        with patch("skill_ovos_soundcloud.cache.time.time", return_value=1000):
+            cache.put("tracks", "piratech", [])
+        with patch("skill_ovos_soundcloud.cache.time.time", return_value=1030):
+            self.assertEqual(cache.get("tracks", "piratech"), [])
+        with patch("skill_ovos_soundcloud.cache.time.time", return_value=1061):
+            self.assertIsNone(cache.get("tracks", "piratech"))
+        self.assertEqual(len(cache), 0)
+
+    def test_stale_if_error(self):
+        cache = self.get_cache(ttl=60, stale_if_error=60)
+        with patch("skill_ovos_soundcloud.cache.time.time", return_value=1000):
+            cache.put("tracks", "piratech", [{"title": "nuclear chill"}])
+        with patch("skill_ovos_soundcloud.cache.time.time", return_value=1090):
+            self.assertIsNone(cache.get("tracks", "piratech"))
+            self.assertIsNone(cache.lookup("tracks", "piratech"))
+            self.assertEqual(cache.sweep(), 0)
+            entry = cache.lookup("tracks", "piratech", stale=True)
+            self.assertEqual(entry["results"], [{"title": "nuclear chill"}])
+            self.assertEqual(cache.stats["stale_hits"], 1)
+        with patch("skill_ovos_soundcloud.cache.time.time", return_value=1121):
+            self.assertIsNone(cache.lookup("tracks", "piratech", stale=True))
+        self.assertEqual(len(cache), 0)
+
+    def test_tracks(self):
+        cache = self.get_cache()
+        track = {"title": "lost", "artist": "JoR", "duration": 200,
+                 "image": "", "url": "https://soundcloud.com/jor/lost"}
+        cache.put("tracks", "jor", [dict(track, match_confidence=90)])
+        cache.put("artists", "jor", [{"title": "JoR", "tracks": [track]}])
+        self.assertEqual(cache.tracks(), [track])
+
+    def test_sweep(self):
+        cache = self.get_cache(ttl=60)
+        with patch("skill_ovos_soundcloud.cache.time.time", return_value=1000):
+            cache.put("tracks", "old", [])
+        cache.put("tracks", "new", [])
+        self.assertEqual(cache.sweep(), 1)
+        self.assertEqual(len(cache), 1)
+        self.assertIsNotNone(cache.get("tracks", "new"))
+
+    def test_lru_max_entries(self):
+        cache = self.get_cache(max_entries=2)
+        cache.put("tracks", "a", [])
+        cache.put("tracks", "b", [])
+        cache.get("tracks", "a")  # b is now least recently used
+        cache.put("sets", "c", [])
+        self.assertIsNotNone(cache.get("tracks", "a"))
+        self.assertIsNone(cache.get("tracks", "b"))
+        self.assertIsNotNone(cache.get("sets", "c"))
+
+    def test_lru_max_bytes(self):
+        cache = self.get_cache(max_bytes=100)
+        cache.put("tracks", "a", [{"title": "x" * 40}])
+        cache.put("tracks", "b", [{"title": "x" * 40}])
+        self.assertIsNone(cache.get("tracks", "a"))
+        self.assertIsNotNone(cache.get("tracks", "b"))
+        self.assertLessEqual(cache.size_bytes, 100)
+
+    def test_stats(self):
+        cache = self.get_cache()
+        cache.get("tracks", "piratech")
+        cache.put("tracks", "piratech", [])
+        cache.get("tracks", "piratech")
+        cache.get("tracks", "piratech")
+        self.assertEqual(cache.stats["hits"], 2)
+        self.assertEqual(cache.stats["misses"], 1)
+        self.assertEqual(cache.stats["entries"], 1)
+
+    def test_partial(self):
+        cache = self.get_cache()
+        cache.put("tracks", "piratech", [{"title": "a"}], complete=False)
+        cache.store()
+        cache = self.get_cache()
+        self.assertIsNone(cache.get("tracks", "piratech"))
+        self.assertNotIn(("tracks", "piratech"), cache)
+        entry = cache.lookup("tracks", "piratech")
+        self.assertFalse(entry["complete"])
+        self.assertEqual(entry["results"], [{"title": "a"}])
+        self.assertEqual(cache.stats["partial_hits"], 1)
+
+        cache.put("tracks", "piratech", [{"title": "a"}, {"title": "b"}])
+        self.assertTrue(cache.lookup("tracks", "piratech")["complete"])
+
+    def test_expiring(self):
+        cache = self.get_cache(ttl=100)
+        with patch("skill_ovos_soundcloud.cache.time.time", return_value=1000):
+            cache.put("tracks", "a", [])
+            cache.put("tracks", "b", [])
+            cache.put("tracks", "c", [])
+        with patch("skill_ovos_soundcloud.cache.time.time", return_value=1050):
+            cache.put("tracks", "fresh", [])
+            cache.get("tracks", "b")
+            cache.get("tracks", "b")
+            cache.get("tracks", "a")
+            self.assertEqual(cache.age("tracks", "a"), 50)
+            self.assertIsNone(cache.age("tracks", "missing"))
+            self.assertEqual(cache.expiring(10), [])
+            # most hits first, then most recently used
+            self.assertEqual(cache.expiring(60),
+                             [("tracks", "b"), ("tracks", "a"),
+                              ("tracks", "c")])
+            self.assertEqual(cache.expiring(60, limit=1), [("tracks", "b")])
+
+    def test_shared_tracks(self):
+        track = {"title": "nuclear chill", "artist": "Piratech",
+                 "duration": 200, "image": "",
+                 "url": "https://soundcloud.com/piratech/nuclear-chill"}
+        playlist = {"title": "Piratech (Featured Tracks)", "image": "",
+                    "match_confidence": 100, "tracks": [track]}
+        cache = self.get_cache()
+        cache.put("artists", "piratech", [playlist])
+        cache.put("tracks", "piratech", [dict(track, match_confidence=90)])
+        cache.put("sets", "piratech", [{"title": "not a track"}])
+        cache.store()
+
+        cache = self.get_cache()
+        # the track is stored once
+        self.assertEqual(list(cache.backend.get_tracks([track["url"]])),
+                         [track["url"]])
+        self.assertEqual(cache.get("artists", "piratech"), [playlist])
+        self.assertEqual(cache.get("tracks", "piratech"),
+                         [dict(track, match_confidence=90)])
+        self.assertEqual(cache.get("sets", "piratech"),
+                         [{"title": "not a track"}])
+
+        # unused tracks are deleted with the last entry using them
+        size = cache.size_bytes
+        cache.max_entries = 3
+        cache.put("sets", "jor", [])  # evicts artists/piratech
+        self.assertEqual(len(cache), 3)
+        self.assertEqual(cache.backend.get_tracks([track["url"]]).keys(),
+                         {track["url"]})
+        cache.max_entries = 1
+        cache.put("sets", "jor", [])
+        self.assertEqual(cache.backend.get_tracks([track["url"]]), {})
+        self.assertLess(cache.size_bytes, size)
+
+    def test_track_bytes(self):
+        def playlist(*titles):
+            return {"title": "Piratech", "tracks": [
+                {"title": t, "artist": "Piratech", "duration": 200,
+                 "image": "", "url": f"https://soundcloud.com/piratech/{t}"}
+                for t in titles]}
+
+        cache = self.get_cache(max_entries=2)
+        with patch.object(cache.backend, "tracks_size",
+                          side_effect=AssertionError("full scan")), \
+                patch.object(cache.backend, "prune_tracks",
+                             side_effect=AssertionError("full scan")):
+            cache.put("artists", "a", [playlist("x", "y")])
+            cache.put("artists", "b", [playlist("y", "z")])
+            cache.put("artists", "a", [playlist("x", "w")])  # y still used
+            cache.put("sets", "c", [playlist("v")])  # evicts b, y and z
+            cache.put("sets", "c", [playlist("v", "longer title")])
+        # kept up to date without measuring every track again
+        self.assertEqual(cache._track_bytes, cache.backend.tracks_size())
+        self.assertEqual(
+            set(cache.backend.get_tracks(
+                f"https://soundcloud.com/piratech/{t}"
+                for t in ("v", "w", "x", "y", "z", "longer title"))),
+            {f"https://soundcloud.com/piratech/{t}"
+             for t in ("v", "w", "x", "longer title")})
+
+    def test_clear(self):
+        cache = self.get_cache()
+        cache.put("tracks", "piratech", [])
+        cache.clear()
+        cache.store()
+        self.assertEqual(len(self.get_cache()), 0)
+
+
+class TestJsonSearchCache(TestSearchCache):
+    backend = "json"
+
+    def test_legacy_format(self):
+        db = JsonCacheBackend("test.search.history", xdg_folder=self.folder)
+        db._db["tracks"] = {"piratech": [{"title": "nuclear chill"}]}
+        db._db.store()
+        # legacy entries have no timestamp, they are as old as the file
+        cache = self.get_cache()
+        self.assertEqual(cache.get("tracks", "piratech"),
+                         [{"title": "nuclear chill"}])
+        cache = self.get_cache(ttl=60)
+        with patch("skill_ovos_soundcloud.cache.time.time",
+                   return_value=getmtime(db.path) + 61):
+            self.assertIsNone(cache.get("tracks", "piratech"))
+
+
+class TestSQLiteMigration(unittest.TestCase):
+    def setUp(self):
+        self.folder = mkdtemp()
+
+    def tearDown(self):
+        rmtree(self.folder, ignore_errors=True)
+
+    def test_migrate_json(self):
+        cache = SearchCache("test.search.history", xdg_folder=self.folder,
+                            backend="json")
+        cache.put("tracks", "piratech", [{"title": "nuclear chill"}])
+        cache.store()
+        json_path = cache.path
+
+        cache = SearchCache("test.search.history", xdg_folder=self.folder,
+                            backend="sqlite")
+        self.assertIsInstance(cache.backend, SQLiteCacheBackend)
+        self.assertEqual(cache.get("tracks", "piratech"),
+                         [{"title": "nuclear chill"}])
+        self.assertFalse(exists(json_path))
+        self.assertTrue(exists(json_path + ".migrated"))
+
+    def test_migrate_baseline_format(self):
+        # file written by previous versions of the skill
+        json_path = join(self.folder, "common_play",
+                         "test.search.history.json")
+        makedirs(dirname(json_path))
+        with open(json_path, "w") as f:
+            json.dump({"artists": {"piratech": [{"title": "Piratech"}]},
+                       "sets": {},
+                       "tracks": {"nuclear chill": [{"title": "a"},
+                                                    {"title": "b"}]}}, f)
+
+        cache = SearchCache("test.search.history", xdg_folder=self.folder,
+                            backend="sqlite")
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get("artists", "piratech"),
+                         [{"title": "Piratech"}])
+        self.assertEqual(cache.get("tracks", "nuclear chill"),
+                         [{"title": "a"}, {"title": "b"}])
+        self.assertTrue(exists(json_path + ".migrated"))
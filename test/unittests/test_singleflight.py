@@ -0,0 +1,62 @@
+import time
+import unittest
+from threading import Thread
+
+from skill_ovos_soundcloud.singleflight import SingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_coalesce(self):
+        calls = []
+
+        def search(n):
+            calls.append(n)
+            for i in range(n):
+                time.sleep(0.02)
+                yield i
+
+        flights = SingleFlight()
+        results = [None, None, None]
+
+        def consume(idx):
+            results[idx] = list(flights.run("piratech", search, 5))
+
+        threads = [Thread(target=consume, args=(i,)) for i in range(3)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(calls, [5])
+        self.assertEqual(results, [[0, 1, 2, 3, 4]] * 3)
+        self.assertEqual(len(flights), 0)
+
+    def test_different_keys(self):
+        flights = SingleFlight()
+        a = flights.run("a", iter, [1, 2])
+        b = flights.run("b", iter, [3])
+        self.assertEqual(list(a), [1, 2])
+        self.assertEqual(list(b), [3])
+
+    def test_abandoned(self):
+        closed = []
+
+        def search():
+            try:
+                for i in range(100):
+                    yield i
+            finally:
+                closed.append(True)
+
+        flights = SingleFlight()
+        for _ in flights.run("piratech", search):
+            break
+        # closed as soon as the last subscriber leaves
+        self.assertEqual(closed, [True])
+        self.assertEqual(len(flights), 0)
+
+    def test_errors(self):
+        def search():
+            yield 1
+            raise ValueError("upstream error")
+
+        self.assertEqual(list(SingleFlight().run("x", search)), [1])
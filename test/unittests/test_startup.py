@@ -0,0 +1,53 @@
+import sys
+import unittest
+from os.path import dirname, join
+from shutil import rmtree
+from tempfile import mkdtemp
+from unittest.mock import patch
+
+from ovos_utils.fakebus import FakeBus
+from ovos_utils.log import LOG
+
+import skill_ovos_soundcloud
+from skill_ovos_soundcloud import SoundCloudSkill
+from skill_ovos_soundcloud.cache import SearchCache
+
+sys.path.insert(0, join(dirname(dirname(__file__)), "benchmarks"))
+
+import bench_search  # noqa: E402
+from replay import ReplaySoundCloud  # noqa: E402
+
+
+class TestStartup(unittest.TestCase):
+    def test_startup_cost(self):
+        startup = bench_search.measure_startup()
+        LOG.info(f"skill import: {startup['import_ms']:.1f}ms, "
+                 f"construction: {startup['construct_ms']:.1f}ms, "
+                 f"background loading: {startup['warmup_ms']:.1f}ms")
+        # the soundcloud client and the cache wait for the first search
+        self.assertEqual(startup["imported"], [])
+        self.assertGreater(startup["import_ms"], 0)
+        self.assertGreater(startup["construct_ms"], 0)
+
+    def test_deferred_loading(self):
+        folder = mkdtemp()
+        ReplaySoundCloud.load()
+        try:
+            with patch.object(SoundCloudSkill, "_warmup", lambda s: None), \
+                    patch.object(skill_ovos_soundcloud, "SoundCloud",
+                                 ReplaySoundCloud), \
+                    patch.object(SoundCloudSkill, "_open_cache",
+                                 lambda s: SearchCache(xdg_folder=folder)):
+                skill = SoundCloudSkill(bus=FakeBus(),
+                                        skill_id="skill-ovos-soundcloud.lazy")
+                self.assertIsNone(skill._search_cache)
+                self.assertIsNone(skill._session)
+
+                self.assertTrue(list(skill.search_soundcloud(
+                    "piratech", "tracks", lang="en-us")))
+                self.assertIsNotNone(skill._search_cache)
+                self.assertIsNotNone(skill._session)
+                self.assertTrue(len(skill._search_cache))
+                skill.shutdown()
+        finally:
+            rmtree(folder, ignore_errors=True)
@@ -0,0 +1,83 @@
+import base64
+import json
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event
+
+from skill_ovos_soundcloud.streams import StreamCache, StreamResolver, \
+    expires_at
+
+
+def signed_url(expires):
+    policy = json.dumps({"Statement": [{"Condition": {"DateLessThan": {
+        "AWS:EpochTime": expires}}}]}).encode()
+    policy = base64.b64encode(policy).decode()
+    policy = policy.replace("+", "-").replace("=", "_").replace("/", "~")
+    return f"https://cf-media.sndcdn.com/abc.128.mp3?Policy={policy}" \
+           f"&Signature=x&Key-Pair-Id=y"
+
+
+class TestExpiresAt(unittest.TestCase):
+    def test_expires(self):
+        self.assertEqual(expires_at("https://a.b/c.mp3?Expires=1700000000",
+                                    300), 1700000000)
+        self.assertEqual(expires_at(signed_url(1700000000), 300), 1700000000)
+
+    def test_default_ttl(self):
+        for uri in ("https://a.b/c.mp3", "https://a.b/c.mp3?Policy=broken",
+                    "https://a.b/c.mp3?expires=soon"):
+            self.assertAlmostEqual(expires_at(uri, 300), time.time() + 300,
+                                   delta=5)
+
+
+class TestStreamCache(unittest.TestCase):
+    def test_margin(self):
+        cache = StreamCache(margin=60)
+        cache.put("a", "https://a.b/a.mp3", time.time() + 120)
+        cache.put("b", "https://a.b/b.mp3", time.time() + 30)
+        self.assertEqual(cache.get("a"), "https://a.b/a.mp3")
+        # about to expire, never handed out and dropped
+        self.assertIsNone(cache.get("b"))
+        self.assertNotIn("b", cache)
+        self.assertEqual(len(cache), 1)
+
+    def test_max_entries(self):
+        cache = StreamCache(max_entries=2)
+        for url in "abc":
+            cache.put(url, url, time.time() + 600)
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("c"), "c")
+
+
+class TestStreamResolver(unittest.TestCase):
+    def test_submit(self):
+        calls = []
+        gate = Event()
+
+        def resolve(url):
+            calls.append(url)
+            gate.wait(5)
+            return f"{url}.mp3?Expires={int(time.time()) + 600}"
+
+        executor = ThreadPoolExecutor(max_workers=2)
+        resolver = StreamResolver(resolve, executor, StreamCache())
+        self.assertEqual(resolver.submit(["a", "b"]), 2)
+        self.assertEqual(resolver.submit(["a"]), 0)  # being resolved
+        gate.set()
+        executor.shutdown(wait=True)
+        self.assertEqual(sorted(calls), ["a", "b"])
+        self.assertTrue(resolver.cache.get("a").startswith("a.mp3"))
+        self.assertEqual(resolver.submit(["a"]), 0)  # still valid
+
+    def test_errors(self):
+        def resolve(url):
+            raise RuntimeError("extractor not installed")
+
+        executor = ThreadPoolExecutor(max_workers=1)
+        resolver = StreamResolver(resolve, executor, StreamCache())
+        resolver.submit(["a"])
+        executor.shutdown(wait=True)
+        self.assertEqual(len(resolver.cache), 0)
+        self.assertEqual(resolver._pending, set())  # tried again later
@@ -0,0 +1,179 @@
+import time
+import types
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+from unittest.mock import patch
+
+import requests
+
+from skill_ovos_soundcloud.deadline import Deadline
+from skill_ovos_soundcloud.upstream import CircuitBreaker, SessionRequests, \
+    install_session, pooled_session, retrying
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    failures = 0  # answer 503 this many times before succeeding
+    requests = 0
+    connections = set()
+
+    def do_GET(self):
+        cls = type(self)
+        cls.requests += 1
+        cls.connections.add(self.client_address)
+        if cls.failures:
+            cls.failures -= 1
+            status, body = 503, b"unavailable"
+        else:
+            status, body = 200, b'{"collection": []}'
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestPooledSession(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        cls.url = f"http://127.0.0.1:{cls.server.server_port}/search"
+        Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        StubHandler.failures = 0
+        StubHandler.requests = 0
+        StubHandler.connections = set()
+
+    def test_connection_reuse(self):
+        session = pooled_session()
+        for _ in range(5):
+            self.assertEqual(session.get(self.url, timeout=5).status_code, 200)
+        session.close()
+        self.assertEqual(StubHandler.requests, 5)
+        self.assertEqual(len(StubHandler.connections), 1)
+
+    def test_retries(self):
+        StubHandler.failures = 2
+        session = pooled_session(retries=2, backoff=0.01)
+        response = session.get(self.url, timeout=5)
+        session.close()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(StubHandler.requests, 3)
+
+    def test_retries_exhausted(self):
+        StubHandler.failures = 5
+        session = pooled_session(retries=1, backoff=0.01)
+        response = session.get(self.url, timeout=5)
+        session.close()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(StubHandler.requests, 2)
+
+    def test_install_session(self):
+        module = types.ModuleType("client")
+        module.requests = requests
+        session = pooled_session()
+        self.assertIs(install_session(module, session), requests)
+        self.assertIsInstance(module.requests, SessionRequests)
+        self.assertIs(module.requests.RequestException,
+                      requests.RequestException)
+        for _ in range(3):
+            module.requests.get(self.url, timeout=5).raise_for_status()
+        session.close()
+        self.assertEqual(len(StubHandler.connections), 1)
+
+        self.assertIsNone(install_session(types.ModuleType("other"), session))
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens(self):
+        breaker = CircuitBreaker(threshold=2, cooldown=60)
+        breaker.failure()
+        self.assertTrue(breaker.allow())
+        breaker.failure()
+        self.assertTrue(breaker.is_open)
+        self.assertFalse(breaker.allow())
+
+    def test_success_resets(self):
+        breaker = CircuitBreaker(threshold=2, cooldown=60)
+        breaker.failure()
+        breaker.success()
+        breaker.failure()
+        self.assertTrue(breaker.allow())
+
+    def test_half_open(self):
+        breaker = CircuitBreaker(threshold=1, cooldown=0.05)
+        breaker.failure()
+        self.assertFalse(breaker.allow())
+        time.sleep(0.1)
+        self.assertTrue(breaker.allow())  # trial call
+        self.assertFalse(breaker.allow())  # only one
+        breaker.failure()
+        self.assertFalse(breaker.allow())  # open again
+        time.sleep(0.1)
+        self.assertTrue(breaker.allow())
+        breaker.success()
+        self.assertFalse(breaker.is_open)
+        self.assertTrue(breaker.allow())
+
+    def test_cancelled_trial(self):
+        breaker = CircuitBreaker(threshold=1, cooldown=0.05)
+        breaker.failure()
+        time.sleep(0.1)
+        self.assertTrue(breaker.allow())
+        breaker.cancel()  # no outcome, still open
+        self.assertTrue(breaker.allow())  # another trial
+        self.assertFalse(breaker.allow())
+
+
+class TestRetrying(unittest.TestCase):
+    def test_retry_before_results(self):
+        calls = []
+
+        def search(query):
+            calls.append(query)
+            if len(calls) < 3:
+                raise requests.ConnectionError("down")
+            yield query
+
+        self.assertEqual(list(retrying(search, "piratech", retries=2,
+                                       backoff=0.01)), ["piratech"])
+        self.assertEqual(len(calls), 3)
+
+    def test_no_retry_after_results(self):
+        calls = []
+
+        def search(query):
+            calls.append(query)
+            yield query
+            raise requests.ConnectionError("down")
+
+        results = []
+        with self.assertRaises(requests.ConnectionError):
+            for r in retrying(search, "piratech", retries=2, backoff=0.01):
+                results.append(r)
+        self.assertEqual(results, ["piratech"])
+        self.assertEqual(len(calls), 1)
+
+    def test_deadline(self):
+        calls = []
+
+        def search(query):
+            calls.append(query)
+            raise requests.ConnectionError("down")
+            yield
+
+        with patch("skill_ovos_soundcloud.upstream.time.sleep") as sleep:
+            with self.assertRaises(requests.ConnectionError):
+                list(retrying(search, "piratech", retries=5, backoff=10,
+                              deadline=Deadline(1)))
+        self.assertEqual(len(calls), 1)
+        sleep.assert_not_called()
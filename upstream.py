@@ -0,0 +1,157 @@
+import random
+import time
+from threading import Lock
+from types import ModuleType
+from typing import Callable, Iterable, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from ovos_utils.log import LOG
+
+from .deadline import Deadline
+
+
+def pooled_session(pool_size: int = 10, retries: int = 2,
+                   backoff: float = 0.5) -> requests.Session:
+    """ keep-alive connections reused by every search, failed GETs and
+    429/5xx answers are retried with exponential backoff """
+    retry = Retry(total=retries, backoff_factor=backoff,
+                  status_forcelist=(429, 500, 502, 503, 504),
+                  allowed_methods=("GET", "HEAD"),
+                  raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size,
+                          max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class SessionRequests(ModuleType):
+    """ stand-in for the ``requests`` module of a http client library,
+    its module level requests.get/post/... go through ``session`` """
+
+    def __init__(self, session: requests.Session):
+        super().__init__("requests")
+        self.session = session
+
+    def request(self, method, url, **kwargs):
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url, params=None, **kwargs):
+        return self.session.get(url, params=params, **kwargs)
+
+    def head(self, url, **kwargs):
+        return self.session.head(url, **kwargs)
+
+    def post(self, url, data=None, json=None, **kwargs):
+        return self.session.post(url, data=data, json=json, **kwargs)
+
+    def __getattr__(self, name):
+        # exceptions, Session, codes...
+        return getattr(requests, name)
+
+
+def install_session(module: ModuleType,
+                    session: requests.Session) -> Optional[ModuleType]:
+    """ make ``module`` use ``session`` for its module level requests calls
+    (eg. nuvem_de_som, which has no way to pass a session)
+
+    returns the replaced ``requests`` module, None if nothing was replaced """
+    previous = getattr(module, "requests", None)
+    if not isinstance(previous, ModuleType):
+        LOG.warning(f"{module.__name__} does not use requests, "
+                    f"can not pool its connections")
+        return None
+    module.requests = SessionRequests(session)
+    return previous
+
+
+class CircuitOpen(ConnectionError):
+    """ upstream is failing, not even trying """
+
+
+class CircuitBreaker:
+    """ stop calling a failing upstream for a while
+
+    after ``threshold`` consecutive failures the circuit opens and calls
+    fast-fail for ``cooldown`` seconds, then a single trial call is allowed
+    (half open) and its outcome closes or re-opens the circuit
+    """
+
+    def __init__(self, threshold: int = 3, cooldown: float = 60):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened = None
+        self._trial = False
+        self._lock = Lock()
+
+    @property
+    def is_open(self) -> bool:
+        with self._lock:
+            return self.opened is not None and \
+                (self._trial or time.monotonic() - self.opened < self.cooldown)
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened is None:
+                return True
+            if self._trial or time.monotonic() - self.opened < self.cooldown:
+                return False
+            self._trial = True  # half open, let one call through
+            return True
+
+    def success(self):
+        with self._lock:
+            if self.opened is not None:
+                LOG.info("soundcloud is reachable again")
+            self.failures = 0
+            self.opened = None
+            self._trial = False
+
+    def cancel(self):
+        """ the trial call ended without an outcome (eg. it was abandoned
+        before any answer), another one is let through """
+        with self._lock:
+            self._trial = False
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or (self.opened is None and
+                               self.failures >= self.threshold):
+                LOG.warning(f"soundcloud failed {self.failures} times, "
+                            f"not searching for {self.cooldown} seconds")
+                self.opened = time.monotonic()
+            self._trial = False
+
+
+def retrying(func: Callable[..., Iterable], *args, retries: int = 1,
+             backoff: float = 0.5, deadline: Optional[Deadline] = None,
+             **kwargs) -> Iterable:
+    """ iterate ``func(*args, **kwargs)``, calling it again if it fails
+    before producing anything, after ``backoff`` * 2^attempt (+-50%) seconds
+
+    a retry is not attempted if it would not start before the deadline
+    """
+    attempt = 0
+    while True:
+        started = False
+        try:
+            for item in func(*args, **kwargs):
+                started = True
+                yield item
+            return
+        except Exception as e:
+            delay = backoff * 2 ** attempt * random.uniform(0.5, 1.5)
+            remaining = deadline.remaining if deadline else None
+            if started or attempt >= retries or \
+                    (remaining is not None and remaining <= delay):
+                raise
+            LOG.debug(f"soundcloud search failed ({e}), "
+                      f"retrying in {delay:.2f}s")
+            time.sleep(delay)
+            attempt += 1